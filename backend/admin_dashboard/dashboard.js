@@ -0,0 +1,189 @@
+const FIELDS = 'fields=first_name,last_name,email,service_interest,funding_amount,status';
+const STATUS_COLORS = {
+    'pending': 'bg-yellow-100 text-yellow-800',
+    'qualified': 'bg-blue-100 text-blue-800',
+    'approved': 'bg-green-100 text-green-800',
+    'rejected': 'bg-red-100 text-red-800'
+};
+let stats = null;
+let applications = [];
+let currentStatus = 'all';
+
+function renderStats() {
+    const counts = stats.status_counts || {};
+    document.getElementById('stats').innerHTML = `
+        <div class="bg-white p-6 rounded-lg shadow">
+            <h3 class="text-lg font-semibold text-gray-900">Total Applications</h3>
+            <p class="text-3xl font-bold text-green-600">${stats.total_applications}</p>
+        </div>
+        <div class="bg-white p-6 rounded-lg shadow">
+            <h3 class="text-lg font-semibold text-gray-900">Pending</h3>
+            <p class="text-3xl font-bold text-yellow-600">${counts.pending || 0}</p>
+        </div>
+        <div class="bg-white p-6 rounded-lg shadow">
+            <h3 class="text-lg font-semibold text-gray-900">Qualified</h3>
+            <p class="text-3xl font-bold text-blue-600">${counts.qualified || 0}</p>
+        </div>
+        <div class="bg-white p-6 rounded-lg shadow">
+            <h3 class="text-lg font-semibold text-gray-900">Approved</h3>
+            <p class="text-3xl font-bold text-green-600">${counts.approved || 0}</p>
+        </div>
+    `;
+}
+
+function renderApplications() {
+    let html = '';
+    if (applications.length === 0) {
+        html = '<p class="text-gray-500 text-center py-8">No applications found.</p>';
+    } else {
+        html = `
+            <div class="overflow-x-auto">
+                <table class="min-w-full divide-y divide-gray-200">
+                    <thead class="bg-gray-50">
+                        <tr>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Name</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Email</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Service</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Funding</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Status</th>
+                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Date</th>
+                        </tr>
+                    </thead>
+                    <tbody class="bg-white divide-y divide-gray-200">
+        `;
+
+        applications.forEach(app => {
+            const statusColor = STATUS_COLORS[app.status] || 'bg-gray-100 text-gray-800';
+
+            html += `
+                <tr>
+                    <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
+                        ${app.first_name} ${app.last_name}
+                    </td>
+                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+                        <a href="mailto:${app.email}" class="text-blue-600 hover:text-blue-800">${app.email}</a>
+                    </td>
+                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+                        ${app.service_interest.replace('-', ' ').replace(/\b\w/g, l => l.toUpperCase())}
+                    </td>
+                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+                        ${app.funding_amount || 'N/A'}
+                    </td>
+                    <td class="px-6 py-4 whitespace-nowrap">
+                        <span class="px-2 inline-flex text-xs leading-5 font-semibold rounded-full ${statusColor}">
+                            ${app.status}
+                        </span>
+                    </td>
+                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+                        ${new Date(app.submission_date).toLocaleDateString()}
+                    </td>
+                </tr>
+            `;
+        });
+
+        html += `
+                    </tbody>
+                </table>
+            </div>
+        `;
+    }
+
+    document.getElementById('applications').innerHTML = html;
+}
+
+// Load application statistics
+async function loadStats() {
+    try {
+        const response = await fetch('/api/applications/stats/summary');
+        stats = await response.json();
+        renderStats();
+    } catch (error) {
+        console.error('Error loading stats:', error);
+    }
+}
+
+// Load applications
+async function loadApplications(status = currentStatus) {
+    currentStatus = status;
+    try {
+        const url = status === 'all' ? `/api/applications?${FIELDS}` : `/api/applications?status=${status}&${FIELDS}`;
+        const response = await fetch(url);
+        applications = await response.json();
+        renderApplications();
+    } catch (error) {
+        console.error('Error loading applications:', error);
+        document.getElementById('applications').innerHTML = '<p class="text-red-500 text-center py-8">Error loading applications.</p>';
+    }
+}
+
+function reloadAll() {
+    loadStats();
+    loadApplications();
+}
+
+function countStatus(status, delta) {
+    if (!stats) return;
+    stats.status_counts = stats.status_counts || {};
+    stats.status_counts[status] = (stats.status_counts[status] || 0) + delta;
+}
+
+// Patch counters and the table from server-pushed events instead of polling
+function subscribeToEvents() {
+    const events = new EventSource('/api/applications/events');
+    let disconnected = false;
+
+    events.addEventListener('application-created', (event) => {
+        const app = JSON.parse(event.data).application;
+        if (stats) stats.total_applications += 1;
+        countStatus(app.status, 1);
+        if (stats) renderStats();
+        if (currentStatus === 'all' || currentStatus === app.status) {
+            applications.unshift(app);
+            applications = applications.slice(0, 100);
+            renderApplications();
+        }
+    });
+
+    events.addEventListener('status-changed', (event) => {
+        const data = JSON.parse(event.data);
+        const app = data.application;
+        countStatus(data.previous_status, -1);
+        countStatus(app.status, 1);
+        if (stats) renderStats();
+
+        const index = applications.findIndex(row => row.id === app.id);
+        if (currentStatus !== 'all' && app.status !== currentStatus) {
+            if (index !== -1) applications.splice(index, 1);
+        } else if (index !== -1) {
+            applications[index] = app;
+        } else {
+            // The application moved into the filtered view - reload to keep the order
+            loadApplications();
+            return;
+        }
+        renderApplications();
+    });
+
+    // Bulk changes and missed events are handled by reloading once
+    events.addEventListener('applications-imported', reloadAll);
+    events.addEventListener('applications-updated', reloadAll);
+    events.addEventListener('resync', reloadAll);
+    events.onerror = () => { disconnected = true; };
+    events.onopen = () => {
+        if (disconnected) {
+            disconnected = false;
+            reloadAll();
+        }
+    };
+}
+
+// Load data on page load
+window.onload = function() {
+    reloadAll();
+    if (window.EventSource) {
+        subscribeToEvents();
+    } else {
+        // Fall back to polling on browsers without Server-Sent Events
+        setInterval(reloadAll, 30000);
+    }
+};
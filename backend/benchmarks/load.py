@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for Money Mornings API
+Drives the API routes in-process at a fixed concurrency and reports throughput and latency percentiles
+
+The app runs with its normal lifespan (indexes, counters, notification workers) against the
+chosen storage backend: MongoStorage on an in-memory mongomock database (default), the memory
+or SQLite backends, or a real MongoDB when --mongo-url is given. Requests go through httpx's
+ASGI transport, so no network or server process is involved.
+
+Usage: python backend/benchmarks/load.py [--storage mongomock] [--requests 500] [--concurrency 16] [--routes submit,list,get,update,stats]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+# server.py reads its settings at import time; the stand-in database is swapped in before startup
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'money_mornings_benchmark')
+# Every simulated client shares one address, so per-client rate limiting is off by default
+os.environ.setdefault('SUBMIT_RATE_PER_MINUTE', '0')
+# The read and update routes need admin credentials
+os.environ.setdefault('ADMIN_USERNAME', 'benchmark')
+os.environ.setdefault('ADMIN_PASSWORD', 'benchmark')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+STATUSES = ["pending", "qualified", "approved", "rejected"]
+
+
+def application_payload(n):
+    return {
+        "first_name": f"First{n}",
+        "last_name": f"Last{n}",
+        "email": f"lead{n}@example.com",
+        "phone": "18773803417",
+        "business_name": f"Business {n} LLC",
+        "service_interest": "business-funding",
+        "funding_amount": "50000-100000",
+        "time_in_business": "2-5 years",
+    }
+
+
+async def seed_applications(count):
+    """Insert count applications the way the submit path stores them, then rebuild the counters"""
+    sequence = await server.storage.reserve_change_sequence(count) - count if count else 0
+    application_ids = []
+    batch = []
+    for n in range(count):
+        application = server.ApplicationSubmissionCreate(**application_payload(n))
+        sequence += 1
+        document = server.new_application_document(application, change_seq=sequence)
+        document["status"] = STATUSES[n % len(STATUSES)]
+        batch.append(document)
+        application_ids.append(document["id"])
+        if len(batch) == 1000:
+            await server.storage.insert_applications(batch)
+            batch = []
+    if batch:
+        await server.storage.insert_applications(batch)
+    await server.reconcile_application_counters()
+    return application_ids
+
+
+def build_routes(application_ids):
+    """Route name -> function(client, n) issuing one request"""
+    counter = iter(range(10_000_000, 100_000_000))
+
+    async def submit(client, n):
+        return await client.post("/api/applications/submit", json=application_payload(next(counter)))
+
+    async def list_applications(client, n):
+        return await client.get("/api/applications", params={"limit": 50})
+
+    async def get_application(client, n):
+        return await client.get(f"/api/applications/{random.choice(application_ids)}")
+
+    async def update_application(client, n):
+        return await client.put(
+            f"/api/applications/{random.choice(application_ids)}",
+            json={"status": STATUSES[n % len(STATUSES)], "notes": f"Benchmark update {n}"}
+        )
+
+    async def stats(client, n):
+        return await client.get("/api/applications/stats/summary")
+
+    async def search(client, n):
+        return await client.get("/api/applications/search", params={"q": f"last{n % 100}", "mode": "prefix"})
+
+    async def changes(client, n):
+        return await client.get("/api/applications/changes", params={"since": 0, "limit": 100})
+
+    return {
+        "submit": submit,
+        "list": list_applications,
+        "get": get_application,
+        "update": update_application,
+        "stats": stats,
+        "search": search,
+        "changes": changes,
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def drive(client, request, total, concurrency):
+    """Issue total requests from concurrency workers; returns latencies (seconds), status counts and wall time"""
+    latencies = []
+    statuses = Counter()
+    issued = iter(range(total))
+
+    async def worker():
+        for n in issued:
+            started = time.perf_counter()
+            try:
+                response = await request(client, n)
+                statuses[str(response.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def summarize(latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+    milliseconds = lambda value: round(value * 1000, 3) if value is not None else None  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for code, count in statuses.items() if not code.startswith(("2", "3"))),
+        "status_codes": dict(statuses),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": milliseconds(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": milliseconds(percentile(latencies, 0.50)),
+            "p95": milliseconds(percentile(latencies, 0.95)),
+            "p99": milliseconds(percentile(latencies, 0.99)),
+            "max": milliseconds(latencies[-1] if latencies else None),
+        },
+    }
+
+
+def use_storage(args):
+    """Point server at the benchmark storage backend"""
+    if args.storage == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(
+            args.mongo_url,
+            event_listeners=[server.mongo_command_metrics, server.mongo_pool_metrics],
+            **server.mongo_client_options()
+        )
+        server.storage = server.MongoStorage(client, os.environ['DB_NAME'])
+    elif args.storage == "mongomock":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("mongomock-motor is required for --storage mongomock (pip install mongomock-motor)")
+        server.storage = server.MongoStorage(AsyncMongoMockClient(), os.environ['DB_NAME'])
+    elif args.storage == "memory":
+        server.storage = server.MemoryStorage()
+    else:
+        server.storage = server.SQLiteStorage(str(Path(args.workdir) / "benchmark.sqlite3"))
+
+
+async def run(args):
+    use_storage(args)
+    if args.storage == "mongo":
+        await server.storage.client.drop_database(os.environ['DB_NAME'])
+
+    async with server.app.router.lifespan_context(server.app):
+        if server.index_provisioning_task is not None:
+            await server.index_provisioning_task
+        application_ids = await seed_applications(args.seed)
+        routes = build_routes(application_ids)
+
+        transport = httpx.ASGITransport(app=server.app)
+        auth = (os.environ['ADMIN_USERNAME'], os.environ['ADMIN_PASSWORD'])
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", auth=auth) as client:
+            results = {}
+            for name in args.routes:
+                if args.warmup:
+                    await drive(client, routes[name], args.warmup, args.concurrency)
+                results[name] = summarize(*await drive(client, routes[name], args.requests, args.concurrency))
+
+    if args.storage == "mongo":
+        await server.storage.client.drop_database(os.environ['DB_NAME'])
+
+    return {
+        "config": {
+            "requests_per_route": args.requests,
+            "concurrency": args.concurrency,
+            "warmup_per_route": args.warmup,
+            "seed_applications": args.seed,
+            "seed": args.random_seed,
+        },
+        "environment": {
+            "storage": args.storage,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "routes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per route before measuring")
+    parser.add_argument("--seed", type=int, default=1000, help="Applications stored before the run")
+    parser.add_argument("--routes", default="submit,list,get,update,stats",
+                        help="Comma-separated routes: submit,list,get,update,stats,search,changes")
+    parser.add_argument("--storage", choices=["mongomock", "memory", "sqlite", "mongo"], default="mongomock",
+                        help="Storage backend; mongo needs --mongo-url")
+    parser.add_argument("--mongo-url", help="MongoDB to benchmark with --storage mongo (its database is dropped)")
+    parser.add_argument("--random-seed", type=int, default=0, help="Seed for the request mix")
+    parser.add_argument("--output", help="Write the JSON report to this file as well as stdout")
+    args = parser.parse_args()
+
+    args.routes = [name.strip() for name in args.routes.split(",") if name.strip()]
+    known = set(build_routes([]))
+    unknown = [name for name in args.routes if name not in known]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+
+    if args.mongo_url and args.storage == "mongomock":
+        args.storage = "mongo"
+    if args.storage == "mongo" and not args.mongo_url:
+        parser.error("--storage mongo needs --mongo-url")
+
+    random.seed(args.random_seed)
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
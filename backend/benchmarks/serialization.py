@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for Money Mornings API
+Compares per-request CPU time of the Pydantic response path against the orjson fast path
+
+Usage: python backend/benchmarks/serialization.py [--documents 100] [--iterations 500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# server.py reads its Mongo settings at import time; no connection is opened here
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'money_mornings_benchmark')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+import server  # noqa: E402
+
+
+def make_documents(count):
+    """Application documents shaped like the ones stored in Mongo"""
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"lead{i}@example.com",
+            "phone": "18773803417",
+            "business_name": f"Business {i} LLC",
+            "service_interest": "business-funding",
+            "funding_amount": "50000-100000",
+            "time_in_business": "2-5 years",
+            "submission_date": now - timedelta(minutes=i),
+            "status": "pending",
+            "notes": "Called twice, follow up next week" if i % 3 == 0 else None,
+            "version": 0,
+        }
+        for i in range(count)
+    ]
+
+
+def response_field(path, method):
+    for route in server.app.routes:
+        if getattr(route, "path", None) == path and method in route.methods:
+            return route.response_field
+    raise LookupError(f"No route for {method} {path}")
+
+
+async def legacy_list(documents, field):
+    """Previous list path: a model per document, then response_model validation and encoding"""
+    content = [server.ApplicationSubmission(**document) for document in documents]
+    encoded = await serialize_response(field=field, response_content=content, exclude_unset=True)
+    return JSONResponse(encoded).body
+
+
+async def fast_list(documents, field):
+    return server.application_json(documents).body
+
+
+async def legacy_submit(payload, field):
+    """Previous submit path: validate, rebuild the model, dump it for insert, notification and response"""
+    application = server.ApplicationSubmissionCreate(**payload)
+    app_obj = server.ApplicationSubmission(**application.dict())
+    app_obj.dict()
+    app_obj.dict()
+    encoded = await serialize_response(field=field, response_content=app_obj)
+    return JSONResponse(encoded).body
+
+
+async def fast_submit(payload, field):
+    application = server.ApplicationSubmissionCreate(**payload)
+    document = server.new_application_document(application)
+    return server.application_json(document).body
+
+
+async def measure(function, argument, field, iterations):
+    """Average CPU microseconds per call"""
+    await function(argument, field)
+    start = time.process_time()
+    for _ in range(iterations):
+        await function(argument, field)
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+async def run(documents_per_page, iterations):
+    documents = make_documents(documents_per_page)
+    payload = {key: value for key, value in documents[0].items()
+               if key in server.ApplicationSubmissionCreate.model_fields}
+    list_field = response_field("/api/applications", "GET")
+    submit_field = response_field("/api/applications/submit", "POST")
+
+    results = {}
+    for name, legacy, fast, argument, field in (
+        (f"list_{documents_per_page}", legacy_list, fast_list, documents, list_field),
+        ("submit", legacy_submit, fast_submit, payload, submit_field),
+    ):
+        before = await measure(legacy, argument, field, iterations)
+        after = await measure(fast, argument, field, iterations)
+        results[name] = {
+            "before_cpu_us": round(before, 1),
+            "after_cpu_us": round(after, 1),
+            "speedup": round(before / after, 2) if after else None,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=100, help="Documents per list response")
+    parser.add_argument("--iterations", type=int, default=500, help="Requests measured per path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.documents, args.iterations))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,352 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, Depends, status
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Header, Depends, Request, Response, UploadFile, File, status
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from starlette.routing import Match
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import List, Optional, Union
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import asyncio
 import secrets
+import random
+import cProfile
+import pstats
+import marshal
+import math
+import time
+import threading
+import hashlib
+import gzip
+import zlib
+import smtplib
+from email.message import EmailMessage
+import base64
+import json
+import orjson
+import csv
+import io
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from urllib.parse import quote, unquote
+from storage import Storage, MongoStorage, MemoryStorage, SQLiteStorage, prefix_search_terms
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - responses fall back to gzip
+    brotli = None
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Prometheus metrics
+# Request metrics are labelled with the route template (e.g. /api/applications/{application_id})
+# rather than the raw path, so label cardinality stays bounded.
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the last body byte is sent", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ["method", "route"]
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency as seen by the driver", ["collection", "command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "MongoDB commands that returned an error", ["collection", "command"]
+)
+NOTIFICATIONS_PENDING = Gauge(
+    "notifications_pending", "Notifications in the outbox that have not been delivered yet", ["status"]
+)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """PyMongo command listener that records per-collection, per-command latency"""
+    
+    def __init__(self):
+        self._collections = {}
+    
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+    
+    def succeeded(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name).observe(event.duration_micros / 1_000_000)
+    
+    def failed(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name).observe(event.duration_micros / 1_000_000)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
+mongo_command_metrics = MongoCommandMetrics()
+
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool", ["address"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total", "Connection checkouts that failed", ["address", "reason"]
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongo_pool_connections", "Pooled connections per server", ["address", "state"]
+)
+MONGO_POOL_CONNECTIONS_CLOSED = Counter(
+    "mongo_pool_connections_closed_total", "Pooled connections closed", ["address", "reason"]
+)
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """PyMongo CMAP listener tracking connection churn, checkouts and checkout wait time per server
+    
+    The driver's events carry no durations, so a checkout is timed from its
+    started event to its checked-out (or failed) event. Both are emitted on the
+    thread doing the checkout, which keys the pending start.
+    """
+    
+    def __init__(self, recent_waits: int = 1000):
+        self._lock = threading.Lock()
+        self._servers = {}
+        self._checkouts_started = {}
+        self._recent_waits = recent_waits
+        self.since = datetime.utcnow()
+    
+    def _server(self, address) -> dict:
+        label = f"{address[0]}:{address[1]}"
+        server = self._servers.get(label)
+        if server is None:
+            server = self._servers[label] = {
+                "label": label,
+                "open": 0,
+                "in_use": 0,
+                "created": 0,
+                "closed": {},
+                "checkouts": 0,
+                "checkout_failures": {},
+                "pool_clears": 0,
+                "wait_seconds_total": 0.0,
+                "wait_seconds_max": 0.0,
+                "recent_waits": deque(maxlen=self._recent_waits),
+            }
+        return server
+    
+    def _update_gauges(self, server: dict):
+        MONGO_POOL_CONNECTIONS.labels(server["label"], "open").set(server["open"])
+        MONGO_POOL_CONNECTIONS.labels(server["label"], "in_use").set(server["in_use"])
+    
+    def pool_created(self, event):
+        with self._lock:
+            self._server(event.address)
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event.address)["pool_clears"] += 1
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["created"] += 1
+            server["open"] += 1
+            self._update_gauges(server)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["open"] -= 1
+            server["closed"][event.reason] = server["closed"].get(event.reason, 0) + 1
+            self._update_gauges(server)
+        MONGO_POOL_CONNECTIONS_CLOSED.labels(server["label"], event.reason).inc()
+    
+    def connection_check_out_started(self, event):
+        self._checkouts_started[(event.address, threading.get_ident())] = time.perf_counter()
+    
+    def _checkout_wait(self, event) -> Optional[float]:
+        started = self._checkouts_started.pop((event.address, threading.get_ident()), None)
+        return time.perf_counter() - started if started is not None else None
+    
+    def connection_checked_out(self, event):
+        wait = self._checkout_wait(event)
+        with self._lock:
+            server = self._server(event.address)
+            server["checkouts"] += 1
+            server["in_use"] += 1
+            if wait is not None:
+                server["wait_seconds_total"] += wait
+                server["wait_seconds_max"] = max(server["wait_seconds_max"], wait)
+                server["recent_waits"].append(wait)
+            self._update_gauges(server)
+        if wait is not None:
+            MONGO_POOL_CHECKOUT_WAIT.labels(server["label"]).observe(wait)
+    
+    def connection_check_out_failed(self, event):
+        self._checkout_wait(event)
+        with self._lock:
+            server = self._server(event.address)
+            server["checkout_failures"][event.reason] = server["checkout_failures"].get(event.reason, 0) + 1
+        MONGO_POOL_CHECKOUT_FAILURES.labels(server["label"], event.reason).inc()
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["in_use"] -= 1
+            self._update_gauges(server)
+    
+    def stats(self) -> dict:
+        milliseconds = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+        servers = {}
+        with self._lock:
+            for label, server in self._servers.items():
+                waits = sorted(server["recent_waits"])
+                servers[label] = {
+                    "connections": {
+                        "open": server["open"],
+                        "in_use": server["in_use"],
+                        "idle": server["open"] - server["in_use"],
+                        "created": server["created"],
+                        "closed": dict(server["closed"]),
+                    },
+                    "checkouts": server["checkouts"],
+                    "checkout_failures": dict(server["checkout_failures"]),
+                    "pool_clears": server["pool_clears"],
+                    "checkout_wait_ms": {
+                        "mean": milliseconds(server["wait_seconds_total"] / server["checkouts"]) if server["checkouts"] else None,
+                        "max": milliseconds(server["wait_seconds_max"]),
+                        "recent_p50": milliseconds(waits[len(waits) // 2]) if waits else None,
+                        "recent_p99": milliseconds(waits[min(len(waits) - 1, int(len(waits) * 0.99))]) if waits else None,
+                    },
+                }
+        return {"since": self.since, "servers": servers}
+
+mongo_pool_metrics = MongoPoolMetrics()
+
+# Storage
+# Handlers and background workers go through a Storage backend (see storage.py):
+# mongo (the default), memory (process-local, for tests and benchmarks) or sqlite
+# (a single file for small deployments that don't run MongoDB).
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+
+# Seconds a submission Idempotency-Key (and its stored response) is remembered
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+# Seconds sent, skipped and failed notifications stay in the outbox before they are deleted
+NOTIFICATION_RETENTION_SECONDS = int(os.environ.get('NOTIFICATION_RETENTION_SECONDS', '2592000'))
+
+# MongoDB connection pool, per server and per worker process. Unset settings keep
+# the driver defaults (100 connections, no minimum, no wait-queue timeout, 30s
+# server selection) and any options given in MONGO_URL.
+MONGO_POOL_SETTINGS = {
+    # setting: (driver option, smallest allowed value)
+    'MONGO_MAX_POOL_SIZE': ('maxPoolSize', 0),  # 0 means no limit
+    'MONGO_MIN_POOL_SIZE': ('minPoolSize', 0),
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', 1),
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', 1),
+}
+# Supported wire compressors and the module each one needs
+MONGO_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def mongo_client_options() -> dict:
+    """Driver options from the MONGO_* pool settings; raises RuntimeError for invalid values"""
+    options = {}
+    for setting, (option, minimum) in MONGO_POOL_SETTINGS.items():
+        value = os.environ.get(setting, '').strip()
+        if not value:
+            continue
+        try:
+            options[option] = int(value)
+        except ValueError:
+            raise RuntimeError(f"{setting} must be a whole number, got {value!r}")
+        if options[option] < minimum:
+            raise RuntimeError(f"{setting} must be at least {minimum}, got {value!r}")
+    if options.get('maxPoolSize') and options.get('minPoolSize', 0) > options['maxPoolSize']:
+        raise RuntimeError("MONGO_MIN_POOL_SIZE cannot be larger than MONGO_MAX_POOL_SIZE")
+    
+    compressors = [name.strip().lower() for name in os.environ.get('MONGO_COMPRESSORS', '').split(',') if name.strip()]
+    for name in compressors:
+        if name not in MONGO_COMPRESSOR_MODULES:
+            raise RuntimeError(f"Unknown MONGO_COMPRESSORS entry {name!r} - use {', '.join(MONGO_COMPRESSOR_MODULES)}")
+        try:
+            __import__(MONGO_COMPRESSOR_MODULES[name])
+        except ImportError:
+            # The driver would silently fall back to no compression
+            raise RuntimeError(f"MONGO_COMPRESSORS={name} needs the {MONGO_COMPRESSOR_MODULES[name]} package installed")
+    if compressors:
+        options['compressors'] = compressors
+    return options
+
+MONGO_CLIENT_OPTIONS = mongo_client_options() if STORAGE_BACKEND == "mongo" else {}
+
+def create_storage() -> Storage:
+    if STORAGE_BACKEND == "mongo":
+        client = AsyncIOMotorClient(
+            os.environ['MONGO_URL'],
+            event_listeners=[mongo_command_metrics, mongo_pool_metrics],
+            **MONGO_CLIENT_OPTIONS
+        )
+        return MongoStorage(client, os.environ['DB_NAME'], IDEMPOTENCY_TTL_SECONDS, NOTIFICATION_RETENTION_SECONDS)
+    if STORAGE_BACKEND == "memory":
+        return MemoryStorage(IDEMPOTENCY_TTL_SECONDS, NOTIFICATION_RETENTION_SECONDS)
+    if STORAGE_BACKEND == "sqlite":
+        return SQLiteStorage(
+            os.environ.get('SQLITE_PATH', str(ROOT_DIR / 'money_mornings.sqlite3')),
+            IDEMPOTENCY_TTL_SECONDS, NOTIFICATION_RETENTION_SECONDS
+        )
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r} - use mongo, memory or sqlite")
+
+storage = create_storage()
+
+index_provisioning_task: Optional[asyncio.Task] = None
+
+# Seconds between full recounts of the materialized application counters (0 disables)
+COUNTERS_RECONCILE_INTERVAL = int(os.environ.get('COUNTERS_RECONCILE_INTERVAL', '3600'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background jobs and release the storage backend on shutdown"""
+    global index_provisioning_task
+    # Build in the background so a long build on a large collection doesn't block startup
+    index_provisioning_task = asyncio.create_task(storage.prepare())
+    background_tasks = [index_provisioning_task]
+    if COUNTERS_RECONCILE_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(run_counters_reconciler()))
+    for worker_number in range(NOTIFICATION_WORKERS):
+        background_tasks.append(asyncio.create_task(run_notification_worker(worker_number)))
+    yield
+    application_events.close()
+    for task in background_tasks:
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await smtp_pool.close()
+    await storage.close()
 
 # Create the main app without a prefix
-app = FastAPI(title="Money Mornings API", version="1.0.0")
+app = FastAPI(
+    title="Money Mornings API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -49,6 +371,294 @@ def verify_admin_credentials(credentials: HTTPBasicCredentials = Depends(securit
     return credentials.username
 
 
+# Response compression
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick brotli or gzip from an Accept-Encoding header, honouring q=0"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+class StreamCompressor:
+    """Common compress/flush/finish interface over zlib (gzip) and brotli"""
+    
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=4)
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+    
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+def no_compression(request: Request):
+    """Route dependency that opts a response out of CompressionMiddleware"""
+    request.scope["compress"] = False
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression for responses above a size threshold
+
+    Responses that already carry a Content-Encoding, event streams and routes
+    using the no_compression dependency are passed through untouched. Streamed
+    responses are compressed chunk by chunk. A compressed response's ETag gets
+    the encoding as a suffix, since its bytes differ from the uncompressed ones.
+    """
+    
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        start_message = None
+        compressor = None
+        passthrough = False
+        
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                # The first body message decides whether this response is compressed
+                headers = MutableHeaders(raw=start_message["headers"])
+                if ("content-encoding" in headers
+                        or not scope.get("compress", True)
+                        or headers.get("content-type", "").startswith("text/event-stream")
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    if start_message["status"] == 304 and "etag" in headers:
+                        # Revalidating a compressed copy: answer with the validator the client holds
+                        compressed_etag = encoded_etag(headers["etag"], encoding)
+                        if compressed_etag in etag_candidates(Headers(scope=scope).get("if-none-match")):
+                            headers["ETag"] = compressed_etag
+                            headers.add_vary_header("Accept-Encoding")
+                    await send(start_message)
+                    await send(message)
+                    return
+                
+                compressor = StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                if not more_body:
+                    data = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(data))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                del headers["Content-Length"]
+                await send(start_message)
+            
+            data = compressor.compress(body) + (compressor.flush() if more_body else compressor.finish())
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+        
+        await self.app(scope, receive, send_compressed)
+
+class PrecompressedAsset:
+    """Static content compressed once up front and served in the negotiated encoding"""
+    
+    def __init__(self, content: bytes, media_type: str):
+        self.media_type = media_type
+        self.content_hash = hashlib.sha256(content).hexdigest()
+        etag = f'"{self.content_hash[:32]}"'
+        self.variants = {None: content, "gzip": gzip.compress(content, compresslevel=9)}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(content, quality=11)
+        # Each encoding is its own representation with its own strong ETag
+        self.etags = {encoding: etag if encoding is None else encoded_etag(etag, encoding) for encoding in self.variants}
+    
+    def response(self, request: Request, headers: Optional[dict] = None) -> Response:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        response_headers = {"Vary": "Accept-Encoding", "ETag": self.etags[encoding], **(headers or {})}
+        # Only this encoding's ETag validates: a copy in another encoding is different bytes
+        candidates = etag_candidates(request.headers.get("if-none-match"))
+        if "*" in candidates or self.etags[encoding] in candidates:
+            return Response(status_code=304, headers=response_headers)
+        
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], media_type=self.media_type, headers=response_headers)
+
+def route_template(scope) -> str:
+    """The path template of the route that will handle this request, or unmatched"""
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+class MetricsMiddleware:
+    """Per-route request counts, latency histograms and in-flight gauges for Prometheus"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        route = route_template(scope)
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            in_flight.dec()
+
+# On-demand profiling
+# A request is run under cProfile when an admin sends the X-Profile header (with
+# admin Basic credentials) or when it is picked by PROFILE_SAMPLE_PERCENT. cProfile
+# profiles the whole event-loop thread, so only one request is profiled at a time
+# and the trace also contains whatever other coroutines ran meanwhile.
+PROFILE_SAMPLE_PERCENT = float(os.environ.get('PROFILE_SAMPLE_PERCENT', '0'))
+PROFILE_STORE_SIZE = int(os.environ.get('PROFILE_STORE_SIZE', '20'))
+PROFILE_HEADER = "x-profile"
+# Long-lived streams would hold the profiler for minutes
+PROFILE_EXCLUDED_PATHS = {"/api/applications/events", "/metrics"}
+
+class ProfileStore:
+    """The most recent request profiles, oldest dropped first"""
+    
+    def __init__(self, size: int):
+        self._profiles = deque(maxlen=size)
+    
+    def add(self, record: dict):
+        self._profiles.append(record)
+    
+    def list(self) -> List[dict]:
+        return [{key: value for key, value in record.items() if key != "stats"} for record in reversed(self._profiles)]
+    
+    def get(self, profile_id: str) -> Optional[dict]:
+        for record in self._profiles:
+            if record["id"] == profile_id:
+                return record
+        return None
+
+profile_store = ProfileStore(PROFILE_STORE_SIZE)
+
+async def is_admin_request(request: Request) -> bool:
+    try:
+        verify_admin_credentials(await security(request))
+        return True
+    except HTTPException:
+        return False
+
+class ProfilingMiddleware:
+    """Runs selected requests under cProfile and keeps the results in profile_store"""
+    
+    def __init__(self, app, sample_percent: float = 0):
+        self.app = app
+        self.sample_percent = sample_percent
+        self.active = False
+    
+    async def profile_trigger(self, scope) -> Optional[str]:
+        if self.active or scope["path"] in PROFILE_EXCLUDED_PATHS:
+            return None
+        request = Request(scope)
+        if request.headers.get(PROFILE_HEADER) and await is_admin_request(request):
+            return "header"
+        if self.sample_percent > 0 and random.random() * 100 < self.sample_percent:
+            return "sample"
+        return None
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = await self.profile_trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = str(uuid.uuid4())
+        status_code = 500
+        
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+        
+        self.active = True
+        profiler = cProfile.Profile()
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            self.active = False
+            profiler.create_stats()
+            profile_store.add({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "trigger": trigger,
+                "started_at": started_at,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "stats": profiler.stats,
+            })
+
 # Define Models
 class StatusCheck(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -72,6 +682,9 @@ class ApplicationSubmission(BaseModel):
     submission_date: datetime = Field(default_factory=datetime.utcnow)
     status: str = "pending"  # pending, contacted, qualified, approved, rejected
     notes: Optional[str] = None
+    version: int = 0  # incremented on every update
+    updated_at: Optional[datetime] = None
+    change_seq: Optional[int] = None  # position in the change feed, see /applications/changes
 
 class ApplicationSubmissionCreate(BaseModel):
     first_name: str
@@ -83,10 +696,326 @@ class ApplicationSubmissionCreate(BaseModel):
     funding_amount: Optional[str] = None
     time_in_business: Optional[str] = None
 
+class ApplicationSubmissionPartial(BaseModel):
+    """Application restricted to a sparse fieldset; omitted fields are left out of the response"""
+    id: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = None
+    business_name: Optional[str] = None
+    service_interest: Optional[str] = None
+    funding_amount: Optional[str] = None
+    time_in_business: Optional[str] = None
+    submission_date: Optional[datetime] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+    version: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    change_seq: Optional[int] = None
+
 class ApplicationUpdate(BaseModel):
     status: Optional[str] = None
     notes: Optional[str] = None
 
+class ApplicationBulkFilter(BaseModel):
+    status: Optional[str] = None
+    submitted_after: Optional[datetime] = None
+    submitted_before: Optional[datetime] = None
+
+class ApplicationBulkUpdate(BaseModel):
+    ids: Optional[List[str]] = None  # either a list of application ids...
+    filter: Optional[ApplicationBulkFilter] = None  # ...or a filter selecting them
+    update: ApplicationUpdate
+
+# Fast serialization path
+# Documents read back from storage were validated when they were written, so they
+# are encoded straight to JSON with orjson instead of being rebuilt as models.
+def mongo_utcnow() -> datetime:
+    """Current UTC time truncated to the millisecond precision Mongo stores"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def new_application_document(application: ApplicationSubmissionCreate, change_seq: Optional[int] = None) -> dict:
+    """Build the stored document for a validated submission without re-validating it"""
+    now = mongo_utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        **application.dict(),
+        "submission_date": now,
+        "status": "pending",
+        "notes": None,
+        "version": 0,
+        "updated_at": now,
+        "change_seq": change_seq,
+    }
+
+def application_json(content, headers: Optional[dict] = None, status_code: int = 200) -> ORJSONResponse:
+    """Encode trusted application documents (without _id) in a single orjson pass"""
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
+
+# Keyset pagination cursors for the applications list
+def encode_application_cursor(submission_date: datetime, application_id: str) -> str:
+    """Encode the (submission_date, id) position of an application as an opaque cursor"""
+    payload = json.dumps({"d": submission_date.isoformat(), "i": application_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_application_cursor(cursor: str):
+    """Decode a cursor produced by encode_application_cursor into (submission_date, id)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["d"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_application_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Turn a comma-separated fields= parameter into the list of fields to read
+
+    id and submission_date are always included so results can still be paged
+    with a cursor.
+    """
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(ApplicationSubmission.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return ["id", "submission_date", *sorted(requested - {"id", "submission_date"})]
+
+# Materialized application counters
+# A single counters document holds the total, a count per status and a count per
+# submission day. Writes keep it current with atomic increments;
+# reconcile_application_counters rebuilds it. Its generation field is bumped after
+# every write and versions the whole collection; its sequence field hands out
+# change_seq numbers before each write.
+# Recounts that lose the race with a write are retried this many times per reconcile
+COUNTERS_RECONCILE_ATTEMPTS = int(os.environ.get('COUNTERS_RECONCILE_ATTEMPTS', '5'))
+def counter_day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+def escape_counter_key(value: str) -> str:
+    # Statuses are free text, so escape the characters Mongo treats specially in field names
+    return quote(value, safe="").replace(".", "%2E")
+
+def counter_status_key(status_value: str) -> str:
+    return "status." + escape_counter_key(status_value)
+
+def submission_counter_deltas(applications: List[dict]) -> dict:
+    """Build the $inc deltas for newly inserted applications"""
+    deltas = {"generation": 1} if applications else {}
+    for application in applications:
+        for key in ("total", counter_status_key(application["status"]),
+                    "daily." + counter_day_key(application["submission_date"])):
+            deltas[key] = deltas.get(key, 0) + 1
+    return deltas
+
+async def increment_application_counters(deltas: dict):
+    """Atomically apply counter deltas; failures are logged and repaired by reconciliation"""
+    if not deltas:
+        return
+    try:
+        await storage.increment_counters(deltas)
+    except Exception as e:
+        logger.error(f"Failed to update application counters: {str(e)}")
+
+async def reconcile_application_counters() -> Optional[dict]:
+    """Recompute the materialized counters from scratch to repair any drift
+
+    Every write bumps the generation with its increments, so the recount is only
+    stored if the generation is unchanged since before the count - an increment
+    that landed meanwhile is never overwritten. Under steady writes the recount is
+    retried and, after COUNTERS_RECONCILE_ATTEMPTS, skipped (None). A write that
+    has stored its application but not yet incremented the counters when the
+    recount is stored is still counted twice; that window is one round trip.
+    """
+    for attempt in range(COUNTERS_RECONCILE_ATTEMPTS):
+        generation = await storage.get_generation()
+        by_status, by_day = await storage.count_applications()
+        recounted = {
+            "total": sum(by_status.values()),
+            "status": {escape_counter_key(key): count for key, count in by_status.items() if key is not None},
+            "daily": {key: count for key, count in by_day.items() if key is not None},
+            "reconciled_at": datetime.utcnow(),
+        }
+        # Bump the generation as well, since corrected counts change the stats response
+        counters = await storage.replace_counters(recounted, expected_generation=generation)
+        if counters is not None:
+            logger.info(f"Application counters reconciled: {counters['total']} applications")
+            return counters
+        await asyncio.sleep(random.uniform(0, 0.1 * (attempt + 1)))
+    
+    logger.warning(f"Application counters changed during {COUNTERS_RECONCILE_ATTEMPTS} recounts - reconcile skipped")
+    return None
+
+# Conditional GET support
+def application_etag(application: dict) -> str:
+    return f'"{application["id"]}-{application.get("version", 0)}"'
+
+def collection_etag(generation: int, request: Request, *extra: str) -> str:
+    """Strong ETag for a query result, derived from the collection generation and the query"""
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha1(json.dumps([request.url.path, generation, query, *extra]).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+# A compressed response is a different representation, so CompressionMiddleware
+# suffixes its strong ETag with the content-coding ("abc" becomes "abc-gzip")
+ETAG_ENCODING_SUFFIXES = ("-gzip", "-br")
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    if not (etag.startswith('"') and etag.endswith('"')):
+        return etag  # weak validators already ignore the content-coding
+    return f'{etag[:-1]}-{encoding}"'
+
+def unencoded_etag(etag: str) -> str:
+    """The ETag a handler computed, given the one a client saw on a possibly compressed response"""
+    for suffix in ETAG_ENCODING_SUFFIXES:
+        if etag.endswith(f'{suffix}"'):
+            return f'{etag[:-len(suffix) - 1]}"'
+    return etag
+
+def etag_candidates(if_none_match: Optional[str]) -> List[str]:
+    """Entity tags listed in an If-None-Match header, for weak comparison"""
+    return [candidate.strip().removeprefix("W/") for candidate in (if_none_match or "").split(",") if candidate.strip()]
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether If-None-Match names etag, in any content-coding"""
+    candidates = etag_candidates(if_none_match)
+    return "*" in candidates or any(etag in (candidate, unencoded_etag(candidate)) for candidate in candidates)
+
+def if_match_versions(if_match: str, application_id: str) -> Optional[List[int]]:
+    """Versions accepted by an If-Match header for an application; None means any version (*)"""
+    versions = []
+    for candidate in (unencoded_etag(candidate.strip()) for candidate in if_match.split(",")):
+        if candidate == "*":
+            return None
+        prefix = f'"{application_id}-'
+        if candidate.startswith(prefix) and candidate.endswith('"') and candidate[len(prefix):-1].isdigit():
+            versions.append(int(candidate[len(prefix):-1]))
+    return versions
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+async def run_counters_reconciler():
+    """Rebuild the application counters at startup and then periodically"""
+    while True:
+        try:
+            await reconcile_application_counters()
+        except Exception as e:
+            logger.error(f"Error reconciling application counters: {str(e)}")
+        await asyncio.sleep(COUNTERS_RECONCILE_INTERVAL)
+
+# Read-through caches
+# Single applications and list pages are cached in process as encoded JSON bodies,
+# so a hit skips both the storage read and serialization, and the byte caps bound
+# the memory actually held. List pages are tagged with the collection generation
+# that every write bumps, so they go stale together in every process the moment
+# anything changes. Cached applications are evicted by this process's writes;
+# writes made through another process show up once the entry's TTL runs out.
+APPLICATION_CACHE_TTL_SECONDS = float(os.environ.get('APPLICATION_CACHE_TTL_SECONDS', '30'))  # 0 disables caching
+APPLICATION_CACHE_MAX_BYTES = int(os.environ.get('APPLICATION_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+APPLICATION_LIST_CACHE_MAX_BYTES = int(os.environ.get('APPLICATION_LIST_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+# Approximate bookkeeping per entry, counted against the byte cap along with the body
+CACHE_ENTRY_OVERHEAD = 256
+
+class ReadThroughCache:
+    """LRU cache of encoded response bodies with a TTL, an optional generation per entry and a byte cap"""
+    
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[object, tuple]" = OrderedDict()  # key -> (body, headers, generation, expires, size)
+        self.bytes = 0
+        # Bumped by every invalidation; a fill that read storage before then is dropped
+        self.token = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_bytes > 0
+    
+    def get(self, key, generation: Optional[int] = None) -> Optional[tuple]:
+        """(body, headers) cached for key, or None when it is missing, expired or from another generation"""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[3] <= time.monotonic():
+            self._discard(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if entry[2] != generation:
+            self._discard(key)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+    
+    def put(self, key, body: bytes, headers: dict, generation: Optional[int] = None, token: Optional[int] = None):
+        """Cache a body read from storage, unless an invalidation happened since token was taken"""
+        if not self.enabled or (token is not None and token != self.token):
+            return
+        size = len(body) + sum(len(name) + len(value) for name, value in headers.items()) + CACHE_ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        
+        self._discard(key)
+        self._entries[key] = (body, headers, generation, time.monotonic() + self.ttl, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted[4]
+            self.evictions += 1
+    
+    def invalidate(self, key):
+        self.token += 1
+        if self._discard(key):
+            self.invalidations += 1
+    
+    def _discard(self, key) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= entry[4]
+        return True
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+application_cache = ReadThroughCache(APPLICATION_CACHE_TTL_SECONDS, APPLICATION_CACHE_MAX_BYTES)
+application_list_cache = ReadThroughCache(APPLICATION_CACHE_TTL_SECONDS, APPLICATION_LIST_CACHE_MAX_BYTES)
+
+def cached_json(body: bytes, headers: dict) -> Response:
+    """Response for a body taken from a read-through cache"""
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -96,33 +1025,56 @@ async def root():
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    await storage.insert_status_check(status_obj.dict())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
 async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
+    status_checks = await storage.list_status_checks(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
-# Email notification function (simplified for compatibility)
-async def send_email_notification(application_data: dict):
-    """Send email notification when new application is submitted"""
-    try:
-        # Email configuration from environment variables
-        smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-        smtp_port = int(os.environ.get('SMTP_PORT', '587'))
-        smtp_username = os.environ.get('SMTP_USERNAME', '')
-        smtp_password = os.environ.get('SMTP_PASSWORD', '')
-        notification_email = os.environ.get('NOTIFICATION_EMAIL', 'admin@moneymornings.com')
-        
-        if not smtp_username or not smtp_password:
-            logger.warning("Email credentials not configured - skipping notification")
-            return
-        
-        # Create simple email content
-        subject = f"New Application Submitted - {application_data['first_name']} {application_data['last_name']}"
-        
-        body = f"""New Money Mornings Empire Application Submitted!
+# Email notifications
+# Notifications are written to the notification outbox by the request
+# handlers and delivered by a pool of background workers, so they survive restarts
+# and failed sends are retried with exponential backoff.
+NOTIFICATION_WORKERS = int(os.environ.get('NOTIFICATION_WORKERS', '2'))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', '5'))
+NOTIFICATION_RETRY_SECONDS = float(os.environ.get('NOTIFICATION_RETRY_SECONDS', '30'))
+NOTIFICATION_LEASE_SECONDS = float(os.environ.get('NOTIFICATION_LEASE_SECONDS', '120'))
+NOTIFICATION_POLL_SECONDS = float(os.environ.get('NOTIFICATION_POLL_SECONDS', '5'))
+# Seconds an application notification waits for its application to be stored
+# before it is dropped (it is queued just ahead of the application insert)
+NOTIFICATION_APPLICATION_GRACE_SECONDS = float(os.environ.get('NOTIFICATION_APPLICATION_GRACE_SECONDS', '60'))
+
+notification_wakeup = asyncio.Event()
+
+def smtp_settings() -> dict:
+    """Email configuration from environment variables
+
+    Delivery is enabled when SMTP credentials are set. An unauthenticated local
+    sink for testing has to be enabled explicitly, e.g.
+    SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_STARTTLS=false SMTP_ALLOW_UNAUTHENTICATED=true.
+    """
+    smtp_username = os.environ.get('SMTP_USERNAME', '')
+    smtp_password = os.environ.get('SMTP_PASSWORD', '')
+    notification_email = os.environ.get('NOTIFICATION_EMAIL', 'admin@moneymornings.com')
+    return {
+        "server": os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+        "port": int(os.environ.get('SMTP_PORT', '587')),
+        "username": smtp_username,
+        "password": smtp_password,
+        "starttls": os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true',
+        "sender": os.environ.get('SMTP_FROM', smtp_username or notification_email),
+        "recipient": notification_email,
+        "configured": bool(smtp_username and smtp_password)
+                      or os.environ.get('SMTP_ALLOW_UNAUTHENTICATED', 'false').lower() == 'true',
+    }
+
+def build_application_email(application_data: dict):
+    """Subject and body of the email sent when a new application is submitted"""
+    subject = f"New Application Submitted - {application_data['first_name']} {application_data['last_name']}"
+    
+    body = f"""New Money Mornings Empire Application Submitted!
 
 APPLICANT DETAILS:
 Name: {application_data['first_name']} {application_data['last_name']}
@@ -130,86 +1082,883 @@ Email: {application_data['email']}
 Phone: {application_data['phone']}
 
 BUSINESS DETAILS:
-Business Name: {application_data.get('business_name', 'Not provided')}
+Business Name: {application_data.get('business_name') or 'Not provided'}
 Service Interest: {application_data['service_interest'].replace('-', ' ').title()}
-Funding Amount: {application_data.get('funding_amount', 'Not specified')}
+Funding Amount: {application_data.get('funding_amount') or 'Not specified'}
 
 Application ID: {application_data['id']}
 Submitted: {application_data['submission_date']}
 
 Admin Dashboard: {os.environ.get('BACKEND_URL', 'http://localhost:8001')}/admin
 """
+    return subject, body
+
+def build_import_summary_email(summary: dict):
+    """Subject and body of the single email sent for a bulk lead import"""
+    subject = f"Lead Import Completed - {summary['inserted']} of {summary['received']} rows imported"
+    
+    body = f"""Money Mornings Empire Lead Import Completed
+
+File: {summary['filename']} ({summary['format']})
+Rows received: {summary['received']}
+Applications imported: {summary['inserted']}
+Rows rejected: {summary['failed']}
+
+Admin Dashboard: {os.environ.get('BACKEND_URL', 'http://localhost:8001')}/admin
+"""
+    return subject, body
+
+NOTIFICATION_BUILDERS = {
+    "application_submitted": build_application_email,
+    "import_summary": build_import_summary_email,
+}
+
+async def enqueue_notification(kind: str, payload: dict, wake: bool = True) -> str:
+    """Record a notification in the outbox and return its id; raises if it cannot be written
+
+    Pass wake=False when the data it describes is written afterwards, and wake
+    the workers once that write has landed.
+    """
+    now = datetime.utcnow()
+    notification_id = str(uuid.uuid4())
+    await storage.insert_notification({
+        "id": notification_id,
+        "kind": kind,
+        "payload": payload,
+        "status": "pending",  # pending, sending, sent, failed, skipped
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+        "locked_until": None,
+        "last_error": None,
+        "sent_at": None,
+    })
+    if wake:
+        notification_wakeup.set()
+    return notification_id
+
+async def cancel_notification(notification_id: str, reason: str):
+    """Drop a queued notification whose data was never written; workers skip it anyway if this fails"""
+    try:
+        await storage.update_notification(notification_id, {
+            "status": "skipped", "last_error": reason, "finished_at": datetime.utcnow(), "locked_until": None
+        })
+    except Exception as e:
+        logger.error(f"Failed to cancel notification {notification_id}: {str(e)}")
+
+class SMTPConnectionPool:
+    """A small pool of reusable SMTP connections shared by the notification workers"""
+    
+    def __init__(self, size: int):
+        self._slots = asyncio.Semaphore(size)
+        self._idle: List[smtplib.SMTP] = []
+    
+    def _connect(self, settings: dict) -> smtplib.SMTP:
+        connection = smtplib.SMTP(settings["server"], settings["port"], timeout=30)
+        if settings["starttls"]:
+            connection.starttls()
+        if settings["username"]:
+            connection.login(settings["username"], settings["password"])
+        return connection
+    
+    @staticmethod
+    def _discard(connection: smtplib.SMTP):
+        try:
+            connection.close()
+        except Exception:
+            pass
+    
+    async def send(self, message: EmailMessage, settings: dict):
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is not None:
+                    try:
+                        await asyncio.to_thread(connection.send_message, message)
+                    except smtplib.SMTPServerDisconnected:
+                        # The server dropped the idle connection - reconnect once
+                        self._discard(connection)
+                        connection = None
+                if connection is None:
+                    connection = await asyncio.to_thread(self._connect, settings)
+                    await asyncio.to_thread(connection.send_message, message)
+            except Exception:
+                if connection is not None:
+                    self._discard(connection)
+                raise
+            self._idle.append(connection)
+    
+    async def close(self):
+        while self._idle:
+            connection = self._idle.pop()
+            try:
+                await asyncio.to_thread(connection.quit)
+            except Exception:
+                self._discard(connection)
+
+smtp_pool = SMTPConnectionPool(int(os.environ.get('SMTP_POOL_SIZE', '2')))
+
+async def claim_notification() -> Optional[dict]:
+    """Lease the next due outbox message; expired leases from crashed workers are reclaimed"""
+    now = datetime.utcnow()
+    return await storage.claim_notification(now, now + timedelta(seconds=NOTIFICATION_LEASE_SECONDS))
+
+async def deliver_notification(notification: dict):
+    """Send one outbox message and record its delivery state"""
+    now = datetime.utcnow()
+    builder = NOTIFICATION_BUILDERS.get(notification["kind"])
+    settings = smtp_settings()
+    
+    if builder is None:
+        state = {"status": "failed", "last_error": f"Unknown notification kind {notification['kind']}", "finished_at": now}
+    elif notification["kind"] == "application_submitted" and await storage.get_application(
+        notification["payload"]["id"], ["id"]
+    ) is None:
+        # Queued ahead of its application insert, which has not landed (yet)
+        if now - notification["created_at"] < timedelta(seconds=NOTIFICATION_APPLICATION_GRACE_SECONDS):
+            state = {"status": "pending", "attempts": notification["attempts"] - 1,
+                     "next_attempt_at": now + timedelta(seconds=min(NOTIFICATION_RETRY_SECONDS, 5))}
+        else:
+            state = {"status": "skipped", "last_error": "Application was never stored", "finished_at": now}
+    elif not settings["configured"]:
+        logger.warning("Email credentials not configured - skipping notification")
+        state = {"status": "skipped", "last_error": "Email not configured", "finished_at": now}
+    else:
+        try:
+            subject, body = builder(notification["payload"])
+            message = EmailMessage()
+            message["Subject"] = subject
+            message["From"] = settings["sender"]
+            message["To"] = settings["recipient"]
+            message.set_content(body)
+            
+            await smtp_pool.send(message, settings)
+            logger.info(f"Notification {notification['id']} sent to {settings['recipient']}: {subject}")
+            state = {"status": "sent", "sent_at": now, "last_error": None, "finished_at": now}
+        except Exception as e:
+            attempts = notification["attempts"]
+            logger.error(f"Failed to send notification {notification['id']} (attempt {attempts}): {str(e)}")
+            if attempts >= NOTIFICATION_MAX_ATTEMPTS:
+                state = {"status": "failed", "last_error": str(e), "finished_at": now}
+            else:
+                backoff = min(NOTIFICATION_RETRY_SECONDS * 2 ** (attempts - 1), 3600)
+                state = {"status": "pending", "last_error": str(e), "next_attempt_at": now + timedelta(seconds=backoff)}
+    
+    state["locked_until"] = None
+    await storage.update_notification(notification["id"], state)
+
+async def run_notification_worker(worker_number: int):
+    """Claim and deliver outbox messages until cancelled"""
+    while True:
+        try:
+            notification = await claim_notification()
+            if notification is not None:
+                await deliver_notification(notification)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Notification worker {worker_number} error: {str(e)}")
+        
+        # Nothing due - sleep until a new message is queued or the next poll
+        try:
+            await asyncio.wait_for(notification_wakeup.wait(), timeout=NOTIFICATION_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        notification_wakeup.clear()
+
+# Live updates for the admin dashboard
+# Handlers publish application events to an in-process broker which fans them out
+# to every connected Server-Sent Events stream. Events only reach dashboards
+# connected to the same server process. Streams end after EVENT_STREAM_MAX_SECONDS
+# and the browser reconnects (and reloads), so an open dashboard never holds up a
+# graceful shutdown for longer than that.
+EVENT_STREAM_MAX_SECONDS = float(os.environ.get('EVENT_STREAM_MAX_SECONDS', '120'))
+EVENT_APPLICATION_FIELDS = ["id", "first_name", "last_name", "email", "service_interest",
+                            "funding_amount", "status", "submission_date"]
+
+class ApplicationEventBroker:
+    """Fan application events out to connected dashboard streams"""
+    
+    def __init__(self, queue_size: int = 100):
+        self._queue_size = queue_size
+        self._subscribers = set()
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+    
+    def publish(self, event: str, data: dict):
+        message = f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client missed events - drop its backlog and ask it to reload
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait("event: resync\ndata: {}\n\n")
+    
+    def close(self):
+        for queue in list(self._subscribers):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+application_events = ApplicationEventBroker()
+
+def event_application(application: dict) -> dict:
+    return {field: application.get(field) for field in EVENT_APPLICATION_FIELDS}
+
+# Admission control for public write endpoints
+# Each client gets a token bucket per route, and a bounded number of admitted
+# requests may be working against storage at once. Requests over either limit are
+# turned away immediately with 429 or 503 and a Retry-After header.
+SUBMIT_RATE_PER_MINUTE = float(os.environ.get('SUBMIT_RATE_PER_MINUTE', '10'))  # 0 disables rate limiting
+SUBMIT_BURST = int(os.environ.get('SUBMIT_BURST', '5'))
+SUBMIT_MAX_CONCURRENCY = int(os.environ.get('SUBMIT_MAX_CONCURRENCY', '20'))  # 0 disables the gate
+SUBMIT_QUEUE_TIMEOUT = float(os.environ.get('SUBMIT_QUEUE_TIMEOUT', '0.25'))
+ADMISSION_MAX_CLIENTS = int(os.environ.get('ADMISSION_MAX_CLIENTS', '10000'))
+# Number of proxies we control in front of the app, each appending the address it
+# saw to X-Forwarded-For (1 on Railway). Entries left of those were written by the
+# client and are ignored. 0 uses the socket address and ignores the header.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+
+def client_ip(request: Request) -> str:
+    if TRUSTED_PROXY_HOPS > 0:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+        if forwarded:
+            # The address seen by the outermost trusted proxy
+            return forwarded[-min(TRUSTED_PROXY_HOPS, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+class AdmissionController:
+    """Token-bucket rate limit per (client, route) plus a concurrency gate, used as a route dependency"""
+    
+    def __init__(self, rate_per_minute: float, burst: int, max_concurrency: int, queue_timeout: float,
+                 max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(burst, 1)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()  # key -> [tokens, last refill]
+        self._slots = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = {"rate_limited": 0, "overloaded": 0}
+    
+    def take_token(self, key: tuple) -> float:
+        """Spend a token for key; returns 0 when admitted, otherwise seconds until a token is available"""
+        if self.rate <= 0:
+            return 0
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
         
-        # Log the notification (for now, until email is fully configured)
-        logger.info(f"Email notification prepared for application {application_data['id']}")
-        logger.info(f"Subject: {subject}")
-        logger.info(f"Recipient: {notification_email}")
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / self.rate
+    
+    async def __call__(self, request: Request):
+        wait = self.take_token((client_ip(request), request.url.path))
+        if wait:
+            self.rejected["rate_limited"] += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
         
-        # TODO: Implement actual email sending once SMTP is configured
-        # For now, we'll just log the notification
+        if self._slots is not None:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected["overloaded"] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is busy, please try again shortly",
+                    headers={"Retry-After": "1"}
+                )
         
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+    
+    def stats(self) -> dict:
+        return {
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "max_concurrency": self.max_concurrency,
+            "queue_timeout_seconds": self.queue_timeout,
+            "tracked_clients": len(self._buckets),
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+submit_admission = AdmissionController(
+    SUBMIT_RATE_PER_MINUTE, SUBMIT_BURST, SUBMIT_MAX_CONCURRENCY, SUBMIT_QUEUE_TIMEOUT, ADMISSION_MAX_CLIENTS
+)
+
+# Idempotent submission
+# A submit carrying an Idempotency-Key first claims the key in the idempotency
+# store, where only one request can hold a key. Retries replay the stored
+# response, and a concurrent duplicate waits for the holder to finish.
+IDEMPOTENCY_LEASE_SECONDS = float(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', '30'))
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', '5'))
+
+def idempotency_fingerprint(application: ApplicationSubmissionCreate) -> str:
+    return hashlib.sha256(orjson.dumps(application.dict(), option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+async def claim_idempotency_key(key: str, fingerprint: str) -> Optional[dict]:
+    """Claim the key for this request; returns the existing record when another request already holds it"""
+    now = datetime.utcnow()
+    claimed = await storage.insert_idempotency_key(key, {
+        "fingerprint": fingerprint,
+        "status": "in_progress",  # in_progress, completed
+        "created_at": now,
+        "locked_until": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+        "response": None,
+    })
+    if claimed:
+        return None
+    
+    deadline = asyncio.get_running_loop().time() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record = await storage.get_idempotency_key(key)
+        if record is None:
+            # The holder failed and released the key; try to take it over
+            return await claim_idempotency_key(key, fingerprint)
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+        if record["status"] == "completed":
+            return record
+        
+        now = datetime.utcnow()
+        if record["locked_until"] < now:
+            # The holder died mid-request; take over its expired lease
+            if await storage.extend_idempotency_lease(
+                key, record["locked_until"], now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)
+            ):
+                return None
+        
+        if asyncio.get_running_loop().time() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "1"}
+            )
+        await asyncio.sleep(0.1)
+
+async def complete_idempotency_key(key: str, response: dict):
+    try:
+        await storage.complete_idempotency_key(key, response)
+    except Exception as e:
+        logger.error(f"Failed to record response for Idempotency-Key {key}: {str(e)}")
+
+async def release_idempotency_key(key: str):
+    """Forget a key whose request failed so the client can retry it"""
+    try:
+        await storage.release_idempotency_key(key)
     except Exception as e:
-        logger.error(f"Failed to prepare email notification: {str(e)}")
-        # Don't raise exception - email failure shouldn't break application submission
+        logger.error(f"Failed to release Idempotency-Key {key}: {str(e)}")
+
 # Money Mornings Application Endpoints
-@api_router.post("/applications/submit", response_model=ApplicationSubmission)
-async def submit_application(application: ApplicationSubmissionCreate):
-    """Submit a new Money Mornings application"""
+@api_router.post("/applications/submit", response_model=ApplicationSubmission, dependencies=[Depends(submit_admission)])
+async def submit_application(
+    application: ApplicationSubmissionCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255)
+):
+    """Submit a new Money Mornings application; retries with the same Idempotency-Key replay the original response"""
+    if idempotency_key:
+        record = await claim_idempotency_key(idempotency_key, idempotency_fingerprint(application))
+        if record is not None:
+            return application_json(record["response"], headers={"Idempotent-Replayed": "true"})
+        try:
+            app_doc = await create_application(application)
+        except BaseException:
+            await release_idempotency_key(idempotency_key)
+            raise
+        await complete_idempotency_key(idempotency_key, app_doc)
+        return application_json(app_doc)
+    
+    return application_json(await create_application(application))
+
+async def create_application(application: ApplicationSubmissionCreate) -> dict:
+    """Store a submitted application and fan out its counters, notification and event"""
     try:
-        # Create application object with auto-generated ID and timestamp
-        app_data = application.dict()
-        app_obj = ApplicationSubmission(**app_data)
+        # Build the stored document once, with auto-generated ID and timestamp
+        app_doc = new_application_document(application, change_seq=await storage.reserve_change_sequence())
+        
+        # Queue the email notification before the insert, so no crash after the insert
+        # can lose it; if the insert never lands the workers skip the notification
+        notification_id = await enqueue_notification("application_submitted", app_doc, wake=False)
         
         # Insert into database
-        result = await db.applications.insert_one(app_obj.dict())
+        try:
+            await storage.insert_application(app_doc)
+        except Exception:
+            await cancel_notification(notification_id, "Application insert failed")
+            raise
+        notification_wakeup.set()
+        await settle_late_writes([app_doc])
+        logger.info(f"New application submitted: {app_doc['email']}")
+        await increment_application_counters(submission_counter_deltas([app_doc]))
         
-        if result.inserted_id:
-            logger.info(f"New application submitted: {app_obj.email}")
-            
-            # Send email notification (non-blocking)
-            asyncio.create_task(send_email_notification(app_obj.dict()))
-            
-            return app_obj
+        application_events.publish("application-created", {"application": event_application(app_doc)})
+        
+        return app_doc
+        
+    except Exception as e:
+        logger.error(f"Error submitting application: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+def iter_import_rows(upload: UploadFile, import_format: str):
+    """Yield (row_number, row) pairs from an uploaded CSV or NDJSON file without loading it whole"""
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        if import_format == "csv":
+            for row_number, row in enumerate(csv.DictReader(text), start=1):
+                # Empty CSV cells mean "not provided"
+                yield row_number, {key: (value if value != "" else None) for key, value in row.items() if key}
         else:
-            raise HTTPException(status_code=500, detail="Failed to save application")
+            row_number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                row_number += 1
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = e
+                yield row_number, row
+    finally:
+        text.detach()
+
+def import_row_errors(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()]
+
+async def insert_import_chunk(chunk: List[tuple]):
+    """Insert one chunk of (row_number, document) pairs and report which rows failed"""
+    failed = await storage.insert_applications([document for _, document in chunk])
+    inserted = [document for index, (_, document) in enumerate(chunk) if index not in failed]
+    errors = [{"row": chunk[index][0], "errors": [message]} for index, message in sorted(failed.items())]
+    return inserted, errors
+
+@api_router.post("/applications/import")
+async def import_applications(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON with one application per line"),
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$", description="Defaults from the file extension"),
+    chunk_size: int = Query(500, ge=1, le=5000, description="Applications written per batch"),
+    username: str = Depends(verify_admin_credentials)
+):
+    """Bulk import partner lead lists
+
+    Each row is validated like a regular submission and valid rows are written
+    in unordered chunks. The response lists every rejected row;
+    one summary notification is sent instead of one per application.
+    """
+    filename = file.filename or "upload"
+    if import_format is None:
+        if filename.lower().endswith(".csv") or file.content_type == "text/csv":
+            import_format = "csv"
+        elif filename.lower().endswith((".ndjson", ".jsonl")):
+            import_format = "ndjson"
+        else:
+            raise HTTPException(status_code=400, detail="Could not detect file format - pass format=csv or format=ndjson")
+    
+    received = 0
+    inserted = 0
+    errors = []
+    chunk = []
+    
+    async def flush():
+        nonlocal inserted
+        first = await storage.reserve_change_sequence(len(chunk)) - len(chunk) + 1
+        # The change feed's settle window runs from the moment the sequence is reserved
+        reserved_at = mongo_utcnow()
+        for offset, (_, document) in enumerate(chunk):
+            document["change_seq"] = first + offset
+            document["updated_at"] = reserved_at
+        written, write_errors = await insert_import_chunk(chunk)
+        await settle_late_writes(written)
+        inserted += len(written)
+        errors.extend(write_errors)
+        await increment_application_counters(submission_counter_deltas(written))
+        chunk.clear()
+    
+    try:
+        for row_number, row in iter_import_rows(file, import_format):
+            received += 1
+            if isinstance(row, ValueError):
+                errors.append({"row": row_number, "errors": [f"Invalid JSON: {str(row)}"]})
+                continue
+            if not isinstance(row, dict):
+                errors.append({"row": row_number, "errors": ["Row is not a JSON object"]})
+                continue
+            try:
+                application = ApplicationSubmissionCreate(**row)
+            except ValidationError as e:
+                errors.append({"row": row_number, "errors": import_row_errors(e)})
+                continue
+            
+            chunk.append((row_number, new_application_document(application)))
+            if len(chunk) >= chunk_size:
+                await flush()
+        if chunk:
+            await flush()
             
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"File must be UTF-8 encoded (failed after {received} rows)")
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Malformed CSV after {received} rows: {str(e)}")
     except Exception as e:
-        logger.error(f"Error submitting application: {str(e)}")
+        logger.error(f"Error importing applications from {filename}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    
+    summary = {
+        "filename": filename,
+        "format": import_format,
+        "received": received,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": sorted(errors, key=lambda error: error["row"]),
+    }
+    logger.info(f"Imported {inserted} of {received} applications from {filename}")
+    
+    if inserted:
+        # One summary notification for the whole file; the rows are already stored,
+        # so a failure to queue it must not fail the import
+        try:
+            await enqueue_notification("import_summary", {key: value for key, value in summary.items() if key != "errors"})
+        except Exception as e:
+            logger.error(f"Failed to queue import_summary notification: {str(e)}")
+        application_events.publish("applications-imported", {"inserted": inserted})
+    
+    return summary
 
-@api_router.get("/applications", response_model=List[ApplicationSubmission])
+@api_router.get(
+    "/applications",
+    response_model=List[Union[ApplicationSubmission, ApplicationSubmissionPartial]],
+    response_model_exclude_unset=True
+)
 async def get_applications(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
+    submitted_after: Optional[datetime] = Query(None, description="Only applications submitted at or after this time"),
+    submitted_before: Optional[datetime] = Query(None, description="Only applications submitted before this time"),
     limit: int = Query(100, description="Number of applications to return"),
-    skip: int = Query(0, description="Number of applications to skip")
+    skip: int = Query(0, description="Number of applications to skip"),
+    cursor: Optional[str] = Query(None, description="Resume after this cursor (from the X-Next-Cursor header)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. first_name,email,status"),
+    username: str = Depends(verify_admin_credentials)
 ):
-    """Get all application submissions with optional filtering"""
+    """Get all application submissions with optional filtering
+
+    Pages can be walked either with skip/limit or, for deep pages, with the
+    opaque cursor returned in the X-Next-Cursor response header. Cursor pages
+    seek directly to (submission_date, id) so every page costs the same.
+    With fields= only the requested fields are read and returned.
+    Responses carry an ETag derived from the collection generation, so a
+    matching If-None-Match is answered with 304 without running the query.
+    Pages are cached per query until the generation moves on.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="skip cannot be combined with cursor")
+    requested_fields = parse_application_fields(fields)
+    
     try:
-        # Build query filter
-        query_filter = {}
-        if status:
-            query_filter["status"] = status
+        generation = await storage.get_generation()
+        etag = collection_etag(generation, request)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        
+        cache_key = (status, submitted_after, submitted_before, cursor, skip, limit,
+                     tuple(requested_fields) if requested_fields else None)
+        cached = application_list_cache.get(cache_key, generation)
+        if cached is not None:
+            body, headers = cached
+            return cached_json(body, {**response.headers, **headers})
         
-        # Get applications from database
-        cursor = db.applications.find(query_filter).sort("submission_date", -1).skip(skip).limit(limit)
-        applications = await cursor.to_list(length=limit)
+        # Get applications, newest first with id as tie-breaker
+        applications = await storage.list_applications(
+            status, submitted_after, submitted_before,
+            after=decode_application_cursor(cursor) if cursor else None,
+            skip=skip, limit=limit, fields=requested_fields
+        )
+        
+        page_headers = {}
+        if applications and len(applications) == limit:
+            last = applications[-1]
+            page_headers["X-Next-Cursor"] = encode_application_cursor(last["submission_date"], last["id"])
         
-        return [ApplicationSubmission(**app) for app in applications]
+        result = application_json(applications, headers={**response.headers, **page_headers})
+        application_list_cache.put(cache_key, result.body, page_headers, generation)
+        return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving applications: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@api_router.get("/applications/events", dependencies=[Depends(no_compression)])
+async def application_event_stream(request: Request, username: str = Depends(verify_admin_credentials)):
+    """Server-Sent Events feed of application-created and status-changed events"""
+    queue = application_events.subscribe()
+    loop = asyncio.get_running_loop()
+    closes_at = loop.time() + EVENT_STREAM_MAX_SECONDS
+    
+    async def stream_events():
+        try:
+            # Ask browsers to reconnect quickly if the connection drops
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                remaining = closes_at - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=min(15, remaining))
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    message = ": keep-alive\n\n"
+                if message is None:
+                    break
+                yield message
+        finally:
+            application_events.unsubscribe(queue)
+    
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Columns written by the CSV export, in model order
+EXPORT_FIELDS = list(ApplicationSubmission.model_fields)
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+@api_router.get("/applications/export")
+async def export_applications(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    submitted_after: Optional[datetime] = Query(None, description="Only applications submitted at or after this time"),
+    submitted_before: Optional[datetime] = Query(None, description="Only applications submitted before this time"),
+    batch_size: int = Query(500, ge=1, le=10000, description="Documents fetched from storage per batch"),
+    username: str = Depends(verify_admin_credentials)
+):
+    """Stream every matching application as NDJSON or CSV
+
+    Rows are written straight from the storage cursor one batch at a time, so
+    memory use stays flat regardless of how many applications are exported.
+    """
+    cursor = storage.iter_applications(status, submitted_after, submitted_before, batch_size=batch_size)
+    
+    def encode_batch(rows: List[dict], include_header: bool):
+        if export_format == "ndjson":
+            return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+        if include_header:
+            writer.writeheader()
+        for row in rows:
+            writer.writerow({field: export_value(row.get(field)) for field in EXPORT_FIELDS})
+        return buffer.getvalue()
+    
+    async def stream_rows():
+        rows = []
+        exported = 0
+        try:
+            async for row in cursor:
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    yield encode_batch(rows, include_header=exported == 0)
+                    exported += len(rows)
+                    rows = []
+            if rows or exported == 0:
+                yield encode_batch(rows, include_header=exported == 0)
+                exported += len(rows)
+            logger.info(f"Exported {exported} applications as {export_format}")
+        except Exception as e:
+            logger.error(f"Error exporting applications after {exported} rows: {str(e)}")
+            raise
+    
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    filename = f"applications-{datetime.utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        stream_rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Seconds a change must age before the change feed hands it out, so a write that
+# reserved an earlier sequence number but committed later is not skipped. A write
+# that takes longer than this to land is renumbered by settle_late_writes.
+CHANGES_SETTLE_SECONDS = float(os.environ.get('CHANGES_SETTLE_SECONDS', '2'))
+
+async def settle_late_writes(documents: List[dict]):
+    """Renumber written applications whose write landed after the settle window
+
+    The documents carry the change_seq and updated_at they were written with (one
+    reservation, so one updated_at). A write slower than the settle window may sit
+    below a watermark the change feed already handed out, so it gets a fresh
+    change_seq and updated_at; this repeats until a renumbering lands in time.
+    The write itself already succeeded, so failures are logged, not raised.
+    """
+    if CHANGES_SETTLE_SECONDS <= 0 or not documents:
+        return
+    try:
+        while datetime.utcnow() - documents[0]["updated_at"] > timedelta(seconds=CHANGES_SETTLE_SECONDS):
+            first = await storage.reserve_change_sequence(len(documents)) - len(documents) + 1
+            updated_at = mongo_utcnow()
+            for offset, document in enumerate(documents):
+                document["change_seq"] = first + offset
+                document["updated_at"] = updated_at
+            await storage.restamp_changes([(document["id"], document["change_seq"]) for document in documents], updated_at)
+            for document in documents:
+                application_cache.invalidate(document["id"])
+            logger.warning(f"Renumbered {len(documents)} late application writes in the change feed")
+    except Exception as e:
+        logger.error(f"Failed to renumber late application writes: {str(e)}")
+
+@api_router.get("/applications/changes")
+async def get_application_changes(
+    since: int = Query(0, ge=0, description="Watermark returned by the previous call (0 for a full sync)"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of changed applications to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. first_name,email,status"),
+    username: str = Depends(verify_admin_credentials)
+):
+    """Applications created or modified after a watermark
+
+    Every write stamps the application with the next change_seq, so a sync
+    client only reads what changed since its last call. Pass the returned
+    watermark as since= next time; has_more means another call will return more
+    right away. Changes younger than the settle window wait for a later poll.
+    """
+    try:
+        requested_fields = parse_application_fields(fields)
+        if requested_fields:
+            requested_fields += [field for field in ("change_seq", "updated_at") if field not in requested_fields]
+        
+        changed = await storage.application_changes(since, limit + 1, requested_fields)
+        
+        # Stop at the first change that is too recent to be sure nothing is still in flight before it
+        settled_before = datetime.utcnow() - timedelta(seconds=CHANGES_SETTLE_SECONDS)
+        changes = []
+        for application in changed[:limit]:
+            if application.get("updated_at") and application["updated_at"] > settled_before:
+                break
+            changes.append(application)
+        
+        return application_json({
+            "changes": changes,
+            "watermark": changes[-1]["change_seq"] if changes else since,
+            # Changes held back only because they are too recent don't count
+            "has_more": len(changes) == limit and len(changed) > limit,
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving application changes since {since}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.get("/applications/search")
+async def search_applications(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    mode: str = Query("text", pattern="^(text|prefix)$", description="text for ranked full-text search, prefix for type-ahead"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    limit: int = Query(20, ge=1, le=100, description="Number of applications to return"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. first_name,email,status"),
+    username: str = Depends(verify_admin_credentials)
+):
+    """Search applications by name, email, business name or notes
+
+    text mode uses the full-text index and ranks results by relevance (score).
+    prefix mode matches the start of a name, business word or email against
+    the indexed search terms, so type-ahead stays an index range scan.
+    """
+    try:
+        requested_fields = parse_application_fields(fields)
+        
+        if mode == "text":
+            applications = await storage.search_applications_text(q, status, limit, requested_fields)
+        else:
+            tokens = prefix_search_terms(q)[:5]
+            if not tokens:
+                return application_json([])
+            applications = await storage.search_applications_prefix(tokens, status, limit, requested_fields)
+        
+        return application_json(applications)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching applications for {q!r}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @api_router.get("/applications/{application_id}", response_model=ApplicationSubmission)
-async def get_application(application_id: str):
-    """Get a specific application by ID"""
+async def get_application(
+    application_id: str,
+    request: Request,
+    response: Response,
+    username: str = Depends(verify_admin_credentials)
+):
+    """Get a specific application by ID
+
+    The ETag is the application's id and version. A conditional request only
+    reads the version and returns 304 when it still matches. Found applications
+    are served from the read-through cache until they change or expire.
+    """
     try:
-        application = await db.applications.find_one({"id": application_id})
+        if_none_match = request.headers.get("if-none-match")
+        cached = application_cache.get(application_id)
+        if cached is not None:
+            body, headers = cached
+            if etag_matches(if_none_match, headers["ETag"]):
+                return not_modified(headers["ETag"])
+            set_etag(response, headers["ETag"])
+            return cached_json(body, dict(response.headers))
+        
+        if if_none_match:
+            current = await storage.get_application(application_id, ["id", "version"])
+            if current and etag_matches(if_none_match, application_etag(current)):
+                return not_modified(application_etag(current))
+        
+        token = application_cache.token
+        application = await storage.get_application(application_id)
         
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        return ApplicationSubmission(**application)
+        set_etag(response, application_etag(application))
+        result = application_json(application, headers=dict(response.headers))
+        application_cache.put(application_id, result.body, {"ETag": application_etag(application)}, token=token)
+        return result
         
     except HTTPException:
         raise
@@ -218,8 +1967,19 @@ async def get_application(application_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @api_router.put("/applications/{application_id}", response_model=ApplicationSubmission)
-async def update_application(application_id: str, update_data: ApplicationUpdate):
-    """Update application status and notes"""
+async def update_application(
+    application_id: str,
+    update_data: ApplicationUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, description="ETag from a previous read; the update fails with 412 if the application changed since"),
+    username: str = Depends(verify_admin_credentials)
+):
+    """Update application status and notes
+
+    The update and the read-back of the pre-image are one atomic operation. Sending
+    If-Match with the ETag of the version being edited makes the update
+    conditional, so concurrent edits cannot silently overwrite each other.
+    """
     try:
         # Prepare update data
         update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
@@ -227,18 +1987,44 @@ async def update_application(application_id: str, update_data: ApplicationUpdate
         if not update_dict:
             raise HTTPException(status_code=400, detail="No update data provided")
         
-        # Update the application
-        result = await db.applications.update_one(
-            {"id": application_id},
-            {"$set": update_dict}
-        )
+        versions = if_match_versions(if_match, application_id) if if_match else None
         
-        if result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="Application not found")
+        update_dict["change_seq"] = await storage.reserve_change_sequence()
+        update_dict["updated_at"] = mongo_utcnow()
+        
+        # Update and read back in one round trip; the pre-image gives the previous status
+        previous = await storage.update_application(application_id, update_dict, versions)
+        application_cache.invalidate(application_id)
+        
+        if previous is None:
+            current = await storage.get_application(application_id, ["id", "version"])
+            if current is None:
+                raise HTTPException(status_code=404, detail="Application not found")
+            raise HTTPException(
+                status_code=412,
+                detail="Application was modified since it was read",
+                headers={"ETag": application_etag(current)}
+            )
+        
+        # Apply the same update and version bump to the pre-image to get the stored post-image
+        updated_app = {**previous, **update_dict, "version": previous.get("version", 0) + 1}
+        await settle_late_writes([updated_app])
         
-        # Return updated application
-        updated_app = await db.applications.find_one({"id": application_id})
-        return ApplicationSubmission(**updated_app)
+        counter_deltas = {"generation": 1}
+        new_status = update_dict.get("status")
+        if new_status is not None and new_status != previous.get("status"):
+            counter_deltas[counter_status_key(previous.get("status", "pending"))] = -1
+            counter_deltas[counter_status_key(new_status)] = 1
+        await increment_application_counters(counter_deltas)
+        
+        if new_status is not None and new_status != previous.get("status"):
+            application_events.publish("status-changed", {
+                "previous_status": previous.get("status"),
+                "application": event_application(updated_app),
+            })
+        
+        set_etag(response, application_etag(updated_app))
+        return application_json(updated_app, headers=dict(response.headers))
         
     except HTTPException:
         raise
@@ -246,221 +2032,322 @@ async def update_application(application_id: str, update_data: ApplicationUpdate
         logger.error(f"Error updating application {application_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# Most applications a single bulk update may touch
+BULK_UPDATE_MAX_APPLICATIONS = int(os.environ.get('BULK_UPDATE_MAX_APPLICATIONS', '10000'))
+
+@api_router.post("/applications/bulk-update")
+async def bulk_update_applications(
+    bulk_update: ApplicationBulkUpdate,
+    username: str = Depends(verify_admin_credentials)
+):
+    """Apply one status/notes change to many applications at once
+
+    Applications are selected by ids or by filter. They are written in one
+    batch per current status, each write guarded by that status, so the stats
+    counters move by exactly the number of applications changed.
+    """
+    update_dict = {k: v for k, v in bulk_update.update.dict().items() if v is not None}
+    if not update_dict:
+        raise HTTPException(status_code=400, detail="No update data provided")
+    if (bulk_update.ids is None) == (bulk_update.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter")
+    
+    if bulk_update.ids is not None:
+        requested_ids = list(dict.fromkeys(bulk_update.ids))
+        if len(requested_ids) > BULK_UPDATE_MAX_APPLICATIONS:
+            raise HTTPException(status_code=400, detail=f"At most {BULK_UPDATE_MAX_APPLICATIONS} ids per request")
+        selection = {"ids": requested_ids}
+    else:
+        selection = bulk_update.filter.dict()
+        if not any(selection.values()):
+            raise HTTPException(status_code=400, detail="Filter must select by status or submission date")
+    
+    try:
+        matched = await storage.find_application_statuses(**selection, limit=BULK_UPDATE_MAX_APPLICATIONS + 1)
+        if len(matched) > BULK_UPDATE_MAX_APPLICATIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Filter matches more than {BULK_UPDATE_MAX_APPLICATIONS} applications"
+            )
+        
+        ids_by_status = {}
+        for application in matched:
+            ids_by_status.setdefault(application.get("status"), []).append(application["id"])
+        
+        modified_count = 0
+        counter_deltas = {}
+        if matched:
+            new_status = update_dict.get("status")
+            
+            for previous_status, status_ids in ids_by_status.items():
+                # Reserve and stamp each batch right before writing it, so the change
+                # feed's settle window covers the batch's own write
+                first = await storage.reserve_change_sequence(len(status_ids)) - len(status_ids) + 1
+                updated_at = mongo_utcnow()
+                changes = [(application_id, first + offset) for offset, application_id in enumerate(status_ids)]
+                # Skips applications whose status changed since they were read
+                modified = await storage.update_applications_with_status(
+                    changes, previous_status, {**update_dict, "updated_at": updated_at}
+                )
+                await settle_late_writes([
+                    {"id": application_id, "change_seq": change_seq, "updated_at": updated_at}
+                    for application_id, change_seq in changes
+                ])
+                for application_id in status_ids:
+                    application_cache.invalidate(application_id)
+                modified_count += modified
+                
+                if new_status is not None and new_status != previous_status and modified:
+                    previous_key = counter_status_key(previous_status or "pending")
+                    new_key = counter_status_key(new_status)
+                    counter_deltas[previous_key] = counter_deltas.get(previous_key, 0) - modified
+                    counter_deltas[new_key] = counter_deltas.get(new_key, 0) + modified
+            
+            counter_deltas["generation"] = 1
+            await increment_application_counters(counter_deltas)
+            application_events.publish("applications-updated", {"modified": modified_count})
+        
+        found_ids = {application["id"] for application in matched}
+        logger.info(f"Bulk update by {username}: {modified_count} of {len(matched)} applications modified")
+        return {
+            "matched_count": len(matched),
+            "modified_count": modified_count,
+            "not_found": [i for i in requested_ids if i not in found_ids] if bulk_update.ids is not None else [],
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk updating applications: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @api_router.get("/applications/stats/summary")
-async def get_application_stats():
-    """Get application submission statistics"""
+async def get_application_stats(
+    request: Request,
+    response: Response,
+    recent_days: int = Query(7, ge=1, le=365, description="Size of the recent submissions window in days"),
+    username: str = Depends(verify_admin_credentials)
+):
+    """Get application submission statistics from the materialized counters"""
     try:
-        total_applications = await db.applications.count_documents({})
-        pending_applications = await db.applications.count_documents({"status": "pending"})
-        qualified_applications = await db.applications.count_documents({"status": "qualified"})
-        approved_applications = await db.applications.count_documents({"status": "approved"})
+        # Recent submissions are counted from midnight UTC, recent_days days ago. The
+        # 7-day count is always included for clients reading recent_applications_7_days.
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        day_keys = [counter_day_key(today - timedelta(days=offset)) for offset in range(max(recent_days, 7) + 1)]
         
-        # Get recent submissions (last 7 days)
-        seven_days_ago = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        seven_days_ago = seven_days_ago.replace(day=seven_days_ago.day - 7)
+        counters = await storage.get_counters(daily_keys=day_keys)
+        if counters is None:
+            # A skipped reconcile means writes have created the counters meanwhile
+            counters = await reconcile_application_counters() or await storage.get_counters(daily_keys=day_keys) or {}
         
-        recent_applications = await db.applications.count_documents({
-            "submission_date": {"$gte": seven_days_ago}
-        })
+        # The recent window moves at midnight, so the day is part of the ETag
+        etag = collection_etag(counters.get("generation", 0), request, day_keys[0])
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        
+        status_counts = {unquote(key): count for key, count in counters.get("status", {}).items() if count}
+        daily = counters.get("daily", {})
+        recent_applications = sum(daily.get(key, 0) for key in day_keys[:recent_days + 1])
         
         return {
-            "total_applications": total_applications,
-            "pending_applications": pending_applications,
-            "qualified_applications": qualified_applications,
-            "approved_applications": approved_applications,
-            "recent_applications_7_days": recent_applications
+            "total_applications": counters.get("total", 0),
+            "pending_applications": status_counts.get("pending", 0),
+            "qualified_applications": status_counts.get("qualified", 0),
+            "approved_applications": status_counts.get("approved", 0),
+            "status_counts": status_counts,
+            "recent_applications_7_days": sum(daily.get(key, 0) for key in day_keys[:8]),
+            "recent_days": recent_days,
+            "recent_applications": recent_applications
         }
         
     except Exception as e:
         logger.error(f"Error getting application stats: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-# Admin Dashboard HTML (Simple interface to view applications) - PROTECTED
+@api_router.get("/admin/indexes")
+async def get_index_status(username: str = Depends(verify_admin_credentials)):
+    """Report provisioned indexes and any index builds still running"""
+    try:
+        description = await storage.describe_indexes()
+        
+        if index_provisioning_task is None:
+            provisioning = "not_started"
+        elif not index_provisioning_task.done():
+            provisioning = "running"
+        else:
+            provisioning = "complete"
+        
+        return {"backend": storage.name, "provisioning": provisioning, **description}
+        
+    except Exception as e:
+        logger.error(f"Error getting index status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.post("/admin/counters/reconcile")
+async def reconcile_counters(username: str = Depends(verify_admin_credentials)):
+    """Rebuild the materialized application counters on demand"""
+    try:
+        counters = await reconcile_application_counters()
+        if counters is None:
+            raise HTTPException(
+                status_code=409,
+                detail="Applications kept changing during the recount, please try again",
+                headers={"Retry-After": "1"}
+            )
+        return {
+            "total_applications": counters["total"],
+            "status_counts": {unquote(key): count for key, count in counters["status"].items()},
+            "reconciled_at": counters["reconciled_at"],
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error reconciling application counters: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.get("/admin/notifications")
+async def get_notification_status(username: str = Depends(verify_admin_credentials)):
+    """Report outbox delivery state and the most recent failures"""
+    try:
+        return {
+            "status_counts": await storage.notification_status_counts(),
+            "recent_failures": await storage.recent_failed_notifications(20),
+        }
+    except Exception as e:
+        logger.error(f"Error getting notification status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@api_router.get("/admin/admission")
+async def get_admission_status(username: str = Depends(verify_admin_credentials)):
+    """Report the submit path's admission limits and how many requests were admitted or rejected"""
+    return {"submit": submit_admission.stats()}
+
+@api_router.get("/admin/mongo-pool")
+async def get_mongo_pool_status(username: str = Depends(verify_admin_credentials)):
+    """Report this worker's MongoDB pool settings, connection churn, checkouts and checkout wait times"""
+    if storage.name != "mongo":
+        return {"backend": storage.name, "pid": os.getpid(), "options": {}, "since": None, "servers": {}}
+    options = storage.client.options.pool_options
+    # The driver doesn't expose which compressor was negotiated, only what we asked for
+    return {
+        "backend": storage.name,
+        "pid": os.getpid(),
+        "options": {
+            "max_pool_size": options.max_pool_size,
+            "min_pool_size": options.min_pool_size,
+            "wait_queue_timeout_ms": options.wait_queue_timeout * 1000 if options.wait_queue_timeout else None,
+            "server_selection_timeout_ms": storage.client.options.server_selection_timeout * 1000,
+            "compressors": MONGO_CLIENT_OPTIONS.get("compressors", []),
+        },
+        **mongo_pool_metrics.stats(),
+    }
+
+@api_router.get("/admin/cache")
+async def get_cache_status(username: str = Depends(verify_admin_credentials)):
+    """Report size, hit ratio, evictions and invalidations of the application read-through caches"""
+    return {"applications": application_cache.stats(), "application_lists": application_list_cache.stats()}
+
+@api_router.get("/admin/profiles")
+async def list_profiles(username: str = Depends(verify_admin_credentials)):
+    """List the stored request profiles, newest first"""
+    return {"sample_percent": PROFILE_SAMPLE_PERCENT, "profiles": profile_store.list()}
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: str = Query("pstats", pattern="^(pstats|text)$", description="pstats for a .prof file, text for a summary"),
+    limit: int = Query(50, ge=1, le=1000, description="Functions listed in the text summary"),
+    username: str = Depends(verify_admin_credentials)
+):
+    """Download a stored profile as a pstats file (snakeviz, python -m pstats) or a text summary"""
+    record = profile_store.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "text":
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.stats = record["stats"]
+        stats.get_top_level_stats()
+        stats.sort_stats("cumulative").print_stats(limit)
+        header = f"{record['method']} {record['path']} -> {record['status']} in {record['duration_ms']} ms ({record['trigger']})\n"
+        return Response(content=header + stream.getvalue(), media_type="text/plain; charset=utf-8")
+    
+    return Response(
+        content=marshal.dumps(record["stats"]),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    try:
+        for outbox_status in ("pending", "sending"):
+            NOTIFICATIONS_PENDING.labels(outbox_status).set(await storage.count_notifications(outbox_status))
+    except Exception as e:
+        logger.error(f"Failed to count pending notifications for metrics: {str(e)}")
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# Admin Dashboard (Simple interface to view applications)
+# The page is a static bundle in admin_dashboard/. It is built once when the server
+# starts: the stylesheet and script are published under content-hashed names so they
+# can be cached forever, and every file is precompressed.
+ADMIN_DASHBOARD_DIR = ROOT_DIR / 'admin_dashboard'
+ADMIN_ASSET_TYPES = {".css": "text/css; charset=utf-8", ".js": "text/javascript; charset=utf-8"}
+
+class AdminDashboardBundle:
+    """The dashboard HTML shell plus its versioned static assets"""
+    
+    def __init__(self, source_dir: Path):
+        self.assets = {}
+        page = (source_dir / "index.html").read_text()
+        for path in sorted(source_dir.iterdir()):
+            if path.suffix not in ADMIN_ASSET_TYPES:
+                continue
+            asset = PrecompressedAsset(path.read_bytes(), ADMIN_ASSET_TYPES[path.suffix])
+            versioned_name = f"{path.stem}.{asset.content_hash[:12]}{path.suffix}"
+            self.assets[versioned_name] = asset
+            page = page.replace("{{ " + path.name + " }}", f"/admin/assets/{versioned_name}")
+        self.page = PrecompressedAsset(page.encode(), "text/html; charset=utf-8")
+
+admin_dashboard_bundle = AdminDashboardBundle(ADMIN_DASHBOARD_DIR)
+
+@app.get("/admin/assets/{filename}")
+async def admin_dashboard_asset(filename: str, request: Request):
+    """Serve a versioned dashboard asset; names change with content, so they never expire"""
+    asset = admin_dashboard_bundle.assets.get(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return asset.response(request, {"Cache-Control": "public, max-age=31536000, immutable"})
+
+# Admin Dashboard - PROTECTED
 @app.get("/admin", response_class=HTMLResponse)
-async def admin_dashboard(username: str = Depends(verify_admin_credentials)):
+async def admin_dashboard(request: Request, username: str = Depends(verify_admin_credentials)):
     """Secure admin dashboard to view applications - requires authentication"""
-    html_content = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Money Mornings - Admin Dashboard</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <script src="https://cdn.tailwindcss.com"></script>
-        <style>
-            body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }
-        </style>
-    </head>
-    <body class="bg-gray-100">
-        <div class="min-h-screen">
-            <header class="bg-green-600 text-white shadow-lg">
-                <div class="max-w-7xl mx-auto px-4 py-6">
-                    <h1 class="text-3xl font-bold">Money Mornings Empire - Admin Dashboard</h1>
-                    <p class="text-green-100 mt-2">Manage application submissions</p>
-                </div>
-            </header>
-            
-            <main class="max-w-7xl mx-auto px-4 py-8">
-                <div id="stats" class="grid grid-cols-1 md:grid-cols-4 gap-6 mb-8">
-                    <!-- Stats will be loaded here -->
-                </div>
-                
-                <div class="bg-white rounded-lg shadow-lg">
-                    <div class="px-6 py-4 border-b border-gray-200">
-                        <h2 class="text-xl font-semibold text-gray-900">Recent Applications</h2>
-                        <div class="mt-2 flex space-x-4">
-                            <button onclick="loadApplications('all')" class="text-sm bg-green-500 text-white px-3 py-1 rounded">All</button>
-                            <button onclick="loadApplications('pending')" class="text-sm bg-yellow-500 text-white px-3 py-1 rounded">Pending</button>
-                            <button onclick="loadApplications('qualified')" class="text-sm bg-blue-500 text-white px-3 py-1 rounded">Qualified</button>
-                            <button onclick="loadApplications('approved')" class="text-sm bg-green-600 text-white px-3 py-1 rounded">Approved</button>
-                        </div>
-                    </div>
-                    <div id="applications" class="p-6">
-                        <!-- Applications will be loaded here -->
-                    </div>
-                </div>
-            </main>
-        </div>
-        
-        <script>
-            // Load application statistics
-            async function loadStats() {
-                try {
-                    const response = await fetch('/api/applications/stats/summary');
-                    const stats = await response.json();
-                    
-                    document.getElementById('stats').innerHTML = `
-                        <div class="bg-white p-6 rounded-lg shadow">
-                            <h3 class="text-lg font-semibold text-gray-900">Total Applications</h3>
-                            <p class="text-3xl font-bold text-green-600">${stats.total_applications}</p>
-                        </div>
-                        <div class="bg-white p-6 rounded-lg shadow">
-                            <h3 class="text-lg font-semibold text-gray-900">Pending</h3>
-                            <p class="text-3xl font-bold text-yellow-600">${stats.pending_applications}</p>
-                        </div>
-                        <div class="bg-white p-6 rounded-lg shadow">
-                            <h3 class="text-lg font-semibold text-gray-900">Qualified</h3>
-                            <p class="text-3xl font-bold text-blue-600">${stats.qualified_applications}</p>
-                        </div>
-                        <div class="bg-white p-6 rounded-lg shadow">
-                            <h3 class="text-lg font-semibold text-gray-900">Approved</h3>
-                            <p class="text-3xl font-bold text-green-600">${stats.approved_applications}</p>
-                        </div>
-                    `;
-                } catch (error) {
-                    console.error('Error loading stats:', error);
-                }
-            }
-            
-            // Load applications
-            async function loadApplications(status = 'all') {
-                try {
-                    const url = status === 'all' ? '/api/applications' : `/api/applications?status=${status}`;
-                    const response = await fetch(url);
-                    const applications = await response.json();
-                    
-                    let html = '';
-                    if (applications.length === 0) {
-                        html = '<p class="text-gray-500 text-center py-8">No applications found.</p>';
-                    } else {
-                        html = `
-                            <div class="overflow-x-auto">
-                                <table class="min-w-full divide-y divide-gray-200">
-                                    <thead class="bg-gray-50">
-                                        <tr>
-                                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Name</th>
-                                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Email</th>
-                                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Service</th>
-                                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Funding</th>
-                                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Status</th>
-                                            <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Date</th>
-                                        </tr>
-                                    </thead>
-                                    <tbody class="bg-white divide-y divide-gray-200">
-                        `;
-                        
-                        applications.forEach(app => {
-                            const statusColor = {
-                                'pending': 'bg-yellow-100 text-yellow-800',
-                                'qualified': 'bg-blue-100 text-blue-800',
-                                'approved': 'bg-green-100 text-green-800',
-                                'rejected': 'bg-red-100 text-red-800'
-                            }[app.status] || 'bg-gray-100 text-gray-800';
-                            
-                            html += `
-                                <tr>
-                                    <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
-                                        ${app.first_name} ${app.last_name}
-                                    </td>
-                                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                        <a href="mailto:${app.email}" class="text-blue-600 hover:text-blue-800">${app.email}</a>
-                                    </td>
-                                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                        ${app.service_interest.replace('-', ' ').replace(/\b\w/g, l => l.toUpperCase())}
-                                    </td>
-                                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                        ${app.funding_amount || 'N/A'}
-                                    </td>
-                                    <td class="px-6 py-4 whitespace-nowrap">
-                                        <span class="px-2 inline-flex text-xs leading-5 font-semibold rounded-full ${statusColor}">
-                                            ${app.status}
-                                        </span>
-                                    </td>
-                                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                        ${new Date(app.submission_date).toLocaleDateString()}
-                                    </td>
-                                </tr>
-                            `;
-                        });
-                        
-                        html += `
-                                    </tbody>
-                                </table>
-                            </div>
-                        `;
-                    }
-                    
-                    document.getElementById('applications').innerHTML = html;
-                } catch (error) {
-                    console.error('Error loading applications:', error);
-                    document.getElementById('applications').innerHTML = '<p class="text-red-500 text-center py-8">Error loading applications.</p>';
-                }
-            }
-            
-            // Load data on page load
-            window.onload = function() {
-                loadStats();
-                loadApplications();
-            };
-            
-            // Refresh data every 30 seconds
-            setInterval(() => {
-                loadStats();
-                loadApplications();
-            }, 30000);
-        </script>
-    </body>
-    </html>
-    """
-    return html_content
+    return admin_dashboard_bundle.page.response(request, {"Cache-Control": "private, no-cache"})
 
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(ProfilingMiddleware, sample_percent=PROFILE_SAMPLE_PERCENT)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed", "X-Profile-Id"],
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
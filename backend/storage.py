@@ -0,0 +1,1505 @@
+"""
+Storage backends for the Money Mornings API
+
+server.py talks to storage only through the Storage interface below. MongoStorage
+is the production backend; MemoryStorage keeps everything in process memory (tests,
+benchmarks, throwaway demos) and SQLiteStorage keeps everything in a single file for
+small deployments that don't want to run MongoDB.
+
+Documents are plain dicts shaped like the Mongo documents: datetimes are naive UTC
+and the internal prefix-search terms are never returned to callers.
+"""
+
+import asyncio
+import copy
+import logging
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import bson
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Stored application fields, in model order
+APPLICATION_FIELDS = [
+    "id", "first_name", "last_name", "email", "phone", "business_name", "service_interest",
+    "funding_amount", "time_in_business", "submission_date", "status", "notes", "version",
+    "updated_at", "change_seq",
+]
+
+# Relevance weights for full-text search
+TEXT_SEARCH_WEIGHTS = {"last_name": 10, "first_name": 8, "business_name": 8, "email": 5, "notes": 1}
+
+
+def application_search_terms(application: dict) -> List[str]:
+    """Lowercase terms used for prefix (type-ahead) search: name and business words, email and its parts"""
+    terms = set()
+    for field in ("first_name", "last_name", "business_name"):
+        if application.get(field):
+            terms.update(re.findall(r"\w+", application[field].lower()))
+    email = (application.get("email") or "").lower()
+    if email:
+        local_part, _, domain = email.partition("@")
+        terms.update([email, local_part, domain])
+        terms.update(re.findall(r"\w+", local_part))
+    terms.discard("")
+    return sorted(terms)
+
+
+def text_search_terms(query: str) -> List[str]:
+    return list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+
+
+def prefix_search_terms(query: str) -> List[str]:
+    """Type-ahead query split like application_search_terms: words, except email addresses are kept whole"""
+    terms = []
+    for token in query.lower().split():
+        if "@" in token:
+            terms.append(token)
+        else:
+            terms.extend(re.findall(r"\w+", token))
+    return list(dict.fromkeys(terms))
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """Mongo stores naive UTC; convert aware query parameters the same way"""
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def nest_counters(flat: dict) -> dict:
+    """Turn flat counter keys such as status.pending into the nested document shape"""
+    counters = {}
+    for key, value in flat.items():
+        group, dot, name = key.partition(".")
+        if dot:
+            counters.setdefault(group, {})[name] = value
+        else:
+            counters[key] = value
+    return counters
+
+
+class Storage(ABC):
+    """Async storage interface used by the API handlers and background workers"""
+
+    name = "abstract"
+
+    async def prepare(self):
+        """Create indexes and backfill derived fields; run in the background at startup"""
+
+    async def close(self):
+        """Release connections"""
+
+    @abstractmethod
+    async def describe_indexes(self) -> dict:
+        """Provisioned indexes per collection and any index builds still running"""
+        raise NotImplementedError
+
+    # Status checks
+    @abstractmethod
+    async def insert_status_check(self, status_check: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_status_checks(self, limit: int = 1000) -> List[dict]:
+        raise NotImplementedError
+
+    # Applications
+    @abstractmethod
+    async def insert_application(self, application: dict):
+        """Store one application; raises if it cannot be written"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_applications(self, applications: List[dict]) -> Dict[int, str]:
+        """Store many applications, continuing past failures; returns {index: error} for rows not written"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_applications(self, status: Optional[str] = None, submitted_after: Optional[datetime] = None,
+                                submitted_before: Optional[datetime] = None, after: Optional[Tuple[datetime, str]] = None,
+                                skip: int = 0, limit: int = 100, fields: Optional[List[str]] = None) -> List[dict]:
+        """Applications newest first (submission_date, then id), resuming after an optional (submission_date, id)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_applications(self, status: Optional[str] = None, submitted_after: Optional[datetime] = None,
+                          submitted_before: Optional[datetime] = None, batch_size: int = 500) -> AsyncIterator[dict]:
+        """Stream every matching application newest first"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_application(self, application_id: str, fields: Optional[List[str]] = None) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_application(self, application_id: str, update: dict,
+                                 versions: Optional[List[int]] = None) -> Optional[dict]:
+        """Set fields and bump version atomically; returns the pre-image, or None if no version matched"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def find_application_statuses(self, ids: Optional[List[str]] = None, status: Optional[str] = None,
+                                        submitted_after: Optional[datetime] = None,
+                                        submitted_before: Optional[datetime] = None, limit: int = 10000) -> List[dict]:
+        """id and status of the applications selected by ids or by filter"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_applications_with_status(self, changes: List[Tuple[str, int]], previous_status: Optional[str],
+                                              update: dict) -> int:
+        """Apply update to each (id, change_seq) still in previous_status; returns how many were modified"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def restamp_changes(self, changes: List[Tuple[str, int]], updated_at: datetime):
+        """Move each (id, change_seq) up to that change_seq and updated_at, unless a later write already moved it higher"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_applications_text(self, query: str, status: Optional[str] = None, limit: int = 20,
+                                       fields: Optional[List[str]] = None) -> List[dict]:
+        """Full-text search ranked by relevance; each result carries its score"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_applications_prefix(self, prefixes: List[str], status: Optional[str] = None, limit: int = 20,
+                                         fields: Optional[List[str]] = None) -> List[dict]:
+        """Applications with a search term starting with every prefix"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def application_changes(self, since: int, limit: int, fields: Optional[List[str]] = None) -> List[dict]:
+        """Applications with change_seq above since, in change_seq order"""
+        raise NotImplementedError
+
+    # Materialized counters
+    @abstractmethod
+    async def increment_counters(self, deltas: dict):
+        """Atomically add deltas to counter keys such as total, status.pending or daily.2025-01-31"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count_applications(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Full recount: ({status: count}, {YYYY-MM-DD: count})"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def replace_counters(self, recounted: dict, expected_generation: int) -> Optional[dict]:
+        """Overwrite total, status, daily and reconciled_at, bump generation and return the counters
+
+        Only applied while the generation is still expected_generation; returns None
+        (and changes nothing) if a write moved it since.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_counters(self, daily_keys: Optional[List[str]] = None) -> Optional[dict]:
+        """The counters document (daily counts limited to daily_keys when given), or None before the first write"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def reserve_change_sequence(self, count: int = 1) -> int:
+        """Reserve count consecutive change sequence numbers and return the last one"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_generation(self) -> int:
+        raise NotImplementedError
+
+    # Notification outbox
+    # Finished messages (sent, skipped or failed) carry finished_at and are removed
+    # once they are older than the backend's notification retention.
+    @abstractmethod
+    async def insert_notification(self, notification: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim_notification(self, now: datetime, locked_until: datetime) -> Optional[dict]:
+        """Lease the next due message (or one whose lease expired) and count the attempt"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_notification(self, notification_id: str, state: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def notification_status_counts(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def count_notifications(self, status: str) -> int:
+        """Messages in one status, counted from the status index"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def recent_failed_notifications(self, limit: int = 20) -> List[dict]:
+        raise NotImplementedError
+
+    # Idempotency keys
+    @abstractmethod
+    async def insert_idempotency_key(self, key: str, record: dict) -> bool:
+        """Store record under key unless the key is already held; returns whether it was stored"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_idempotency_key(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def extend_idempotency_lease(self, key: str, expected_locked_until: datetime, locked_until: datetime) -> bool:
+        """Take over an in-progress key whose lease is still expected_locked_until"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def complete_idempotency_key(self, key: str, response: dict):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_idempotency_key(self, key: str):
+        """Forget an in-progress key"""
+        raise NotImplementedError
+
+
+# MongoDB
+# Indexes provisioned at startup: (collection, keys, options)
+def mongo_index_specs(idempotency_ttl_seconds: int, notification_retention_seconds: int) -> list:
+    return [
+        ("applications", [("id", 1)], {"name": "id_unique", "unique": True}),
+        ("applications", [("status", 1), ("submission_date", -1), ("id", -1)], {"name": "status_submission_date"}),
+        ("applications", [("submission_date", -1), ("id", -1)], {"name": "submission_date"}),
+        ("applications", [("change_seq", 1)], {"name": "change_seq"}),
+        ("applications", [("search_terms", 1)], {"name": "search_terms"}),
+        ("applications", [(field, "text") for field in TEXT_SEARCH_WEIGHTS],
+         {"name": "search_text", "default_language": "none", "weights": TEXT_SEARCH_WEIGHTS}),
+        ("status_checks", [("timestamp", -1)], {"name": "timestamp"}),
+        ("idempotency_keys", [("created_at", 1)], {"name": "created_at_ttl", "expireAfterSeconds": idempotency_ttl_seconds}),
+        ("notification_outbox", [("id", 1)], {"name": "id_unique", "unique": True}),
+        ("notification_outbox", [("status", 1), ("next_attempt_at", 1)], {"name": "status_next_attempt"}),
+        ("notification_outbox", [("status", 1), ("locked_until", 1)], {"name": "status_locked_until"}),
+        ("notification_outbox", [("finished_at", 1)],
+         {"name": "finished_at_ttl", "expireAfterSeconds": notification_retention_seconds}),
+    ]
+
+
+# Full application reads leave out Mongo's _id and the internal search_terms
+APPLICATION_PROJECTION = {"_id": 0, "search_terms": 0}
+
+COUNTERS_ID = "applications"
+
+
+def mongo_projection(fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        return dict(APPLICATION_PROJECTION)
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+def mongo_application_filter(status: Optional[str] = None, submitted_after: Optional[datetime] = None,
+                             submitted_before: Optional[datetime] = None) -> dict:
+    query_filter = {}
+    if status:
+        query_filter["status"] = status
+    if submitted_after or submitted_before:
+        query_filter["submission_date"] = {}
+        if submitted_after:
+            query_filter["submission_date"]["$gte"] = submitted_after
+        if submitted_before:
+            query_filter["submission_date"]["$lt"] = submitted_before
+    return query_filter
+
+
+class MongoStorage(Storage):
+    """MongoDB through Motor"""
+
+    name = "mongo"
+
+    def __init__(self, client, database_name: str, idempotency_ttl_seconds: int = 86400,
+                 notification_retention_seconds: int = 2592000):
+        self.client = client
+        self.db = client[database_name]
+        self.index_specs = mongo_index_specs(idempotency_ttl_seconds, notification_retention_seconds)
+
+    async def get_index_builds(self) -> List[dict]:
+        """List the index builds currently running against this database"""
+        pipeline = [
+            {"$currentOp": {"allUsers": True, "idleConnections": False}},
+            {"$match": {"command.createIndexes": {"$exists": True}, "ns": {"$regex": f"^{self.db.name}\\."}}},
+        ]
+        builds = []
+        async for op in self.client.admin.aggregate(pipeline):
+            builds.append({
+                "collection": op["command"]["createIndexes"],
+                "indexes": [index.get("name") for index in op["command"].get("indexes", [])],
+                "message": op.get("msg"),
+                "progress": op.get("progress"),
+                "seconds_running": op.get("secs_running"),
+            })
+        return builds
+
+    async def prepare(self):
+        """Idempotently create the indexes the API queries rely on, then backfill derived fields"""
+        try:
+            for build in await self.get_index_builds():
+                logger.info(f"Index build in progress on {build['collection']}: {build['indexes']} ({build['message']})")
+        except Exception as e:
+            logger.warning(f"Could not inspect running index builds: {str(e)}")
+
+        for collection_name, keys, options in self.index_specs:
+            try:
+                await self.db[collection_name].create_index(keys, **options)
+                logger.info(f"Index {collection_name}.{options['name']} is ready")
+            except Exception as e:
+                logger.error(f"Failed to create index {collection_name}.{options['name']}: {str(e)}")
+
+        try:
+            await self.backfill_change_sequence()
+            await self.backfill_search_terms()
+        except Exception as e:
+            logger.error(f"Failed to backfill application fields: {str(e)}")
+
+    async def backfill_change_sequence(self, batch_size: int = 500):
+        """Give applications written before the change feed existed a change_seq"""
+        backfilled = 0
+        while True:
+            pending = await self.db.applications.find(
+                {"change_seq": None}, {"_id": 0, "id": 1, "submission_date": 1}
+            ).sort("submission_date", 1).limit(batch_size).to_list(length=batch_size)
+            if not pending:
+                break
+
+            first = await self.reserve_change_sequence(len(pending)) - len(pending) + 1
+            await self.db.applications.bulk_write([
+                UpdateOne(
+                    {"id": application["id"], "change_seq": None},
+                    {"$set": {"change_seq": first + offset, "updated_at": application["submission_date"]}}
+                )
+                for offset, application in enumerate(pending)
+            ], ordered=False)
+            backfilled += len(pending)
+
+        if backfilled:
+            logger.info(f"Assigned change sequence numbers to {backfilled} existing applications")
+
+    async def backfill_search_terms(self, batch_size: int = 500):
+        """Compute prefix search terms for applications stored before search existed"""
+        backfilled = 0
+        while True:
+            pending = await self.db.applications.find(
+                {"search_terms": None},
+                {"_id": 0, "id": 1, "first_name": 1, "last_name": 1, "business_name": 1, "email": 1}
+            ).limit(batch_size).to_list(length=batch_size)
+            if not pending:
+                break
+
+            await self.db.applications.bulk_write([
+                UpdateOne({"id": application["id"]}, {"$set": {"search_terms": application_search_terms(application)}})
+                for application in pending
+            ], ordered=False)
+            backfilled += len(pending)
+
+        if backfilled:
+            logger.info(f"Computed search terms for {backfilled} existing applications")
+
+    async def close(self):
+        self.client.close()
+
+    async def describe_indexes(self) -> dict:
+        indexes = {}
+        for collection_name in sorted({spec[0] for spec in self.index_specs}):
+            info = await self.db[collection_name].index_information()
+            indexes[collection_name] = sorted(info.keys())
+        try:
+            builds = await self.get_index_builds()
+        except Exception as e:
+            logger.warning(f"Could not inspect running index builds: {str(e)}")
+            builds = None
+        return {"indexes": indexes, "builds_in_progress": builds}
+
+    async def insert_status_check(self, status_check: dict):
+        await self.db.status_checks.insert_one(dict(status_check))
+
+    async def list_status_checks(self, limit: int = 1000) -> List[dict]:
+        return await self.db.status_checks.find({}, {"_id": 0}).to_list(limit)
+
+    async def insert_application(self, application: dict):
+        await self.db.applications.insert_one({**application, "search_terms": application_search_terms(application)})
+
+    async def insert_applications(self, applications: List[dict]) -> Dict[int, str]:
+        if not applications:
+            return {}
+        try:
+            await self.db.applications.insert_many(
+                [{**application, "search_terms": application_search_terms(application)} for application in applications],
+                ordered=False
+            )
+            return {}
+        except BulkWriteError as e:
+            return {err["index"]: err.get("errmsg", "Write failed") for err in e.details.get("writeErrors", [])}
+
+    async def list_applications(self, status=None, submitted_after=None, submitted_before=None, after=None,
+                                skip=0, limit=100, fields=None) -> List[dict]:
+        query_filter = mongo_application_filter(status, submitted_after, submitted_before)
+        if after:
+            after_date, after_id = after
+            query_filter["$or"] = [
+                {"submission_date": {"$lt": after_date}},
+                {"submission_date": after_date, "id": {"$lt": after_id}},
+            ]
+        # Newest first with id as tie-breaker
+        cursor = self.db.applications.find(query_filter, mongo_projection(fields)).sort([("submission_date", -1), ("id", -1)])
+        if skip:
+            cursor = cursor.skip(skip)
+        return await cursor.limit(limit).to_list(length=limit)
+
+    async def iter_applications(self, status=None, submitted_after=None, submitted_before=None, batch_size=500):
+        cursor = (
+            self.db.applications.find(mongo_application_filter(status, submitted_after, submitted_before), APPLICATION_PROJECTION)
+            .sort([("submission_date", -1), ("id", -1)])
+            .batch_size(batch_size)
+        )
+        async for application in cursor:
+            yield application
+
+    async def get_application(self, application_id, fields=None) -> Optional[dict]:
+        return await self.db.applications.find_one({"id": application_id}, mongo_projection(fields))
+
+    async def update_application(self, application_id, update, versions=None) -> Optional[dict]:
+        query_filter = {"id": application_id}
+        if versions is not None:
+            query_filter["$or"] = [{"version": {"$in": versions}}]
+            if 0 in versions:
+                # Applications that were never updated may not store a version yet
+                query_filter["$or"].append({"version": {"$exists": False}})
+
+        # Update and read back in one round trip; the pre-image gives the previous status
+        return await self.db.applications.find_one_and_update(
+            query_filter,
+            {"$set": update, "$inc": {"version": 1}},
+            projection=APPLICATION_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def find_application_statuses(self, ids=None, status=None, submitted_after=None, submitted_before=None,
+                                        limit=10000) -> List[dict]:
+        if ids is not None:
+            query_filter = {"id": {"$in": ids}}
+        else:
+            query_filter = mongo_application_filter(status, submitted_after, submitted_before)
+        return await self.db.applications.find(
+            query_filter, {"_id": 0, "id": 1, "status": 1}
+        ).limit(limit).to_list(length=limit)
+
+    async def update_applications_with_status(self, changes, previous_status, update) -> int:
+        if not changes:
+            return 0
+        result = await self.db.applications.bulk_write([
+            UpdateOne(
+                # Skips applications whose status changed since they were read
+                {"id": application_id, "status": previous_status},
+                {"$set": {**update, "change_seq": change_seq}, "$inc": {"version": 1}}
+            )
+            for application_id, change_seq in changes
+        ], ordered=False)
+        return result.modified_count
+
+    async def restamp_changes(self, changes, updated_at):
+        if not changes:
+            return
+        await self.db.applications.bulk_write([
+            UpdateOne(
+                {"id": application_id, "change_seq": {"$lt": change_seq}},
+                {"$set": {"change_seq": change_seq, "updated_at": updated_at}}
+            )
+            for application_id, change_seq in changes
+        ], ordered=False)
+
+    async def search_applications_text(self, query, status=None, limit=20, fields=None) -> List[dict]:
+        query_filter = mongo_application_filter(status)
+        query_filter["$text"] = {"$search": query}
+        projection = mongo_projection(fields)
+        projection["score"] = {"$meta": "textScore"}
+        cursor = self.db.applications.find(query_filter, projection).sort([("score", {"$meta": "textScore"})])
+        return await cursor.limit(limit).to_list(length=limit)
+
+    async def search_applications_prefix(self, prefixes, status=None, limit=20, fields=None) -> List[dict]:
+        query_filter = mongo_application_filter(status)
+        # Anchored, case-sensitive regexes on an indexed field are index range scans
+        query_filter["$and"] = [{"search_terms": re.compile("^" + re.escape(prefix))} for prefix in prefixes]
+        cursor = self.db.applications.find(query_filter, mongo_projection(fields))
+        return await cursor.limit(limit).to_list(length=limit)
+
+    async def application_changes(self, since, limit, fields=None) -> List[dict]:
+        return await self.db.applications.find(
+            {"change_seq": {"$gt": since}}, mongo_projection(fields)
+        ).sort("change_seq", 1).limit(limit).to_list(length=limit)
+
+    async def increment_counters(self, deltas: dict):
+        await self.db.application_counters.update_one({"_id": COUNTERS_ID}, {"$inc": deltas}, upsert=True)
+
+    async def count_applications(self):
+        pipeline = [
+            {"$facet": {
+                "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+                "by_day": [{"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$submission_date"}},
+                    "count": {"$sum": 1},
+                }}],
+            }}
+        ]
+        result = await self.db.applications.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {"by_status": [], "by_day": []}
+        return ({row["_id"]: row["count"] for row in facets["by_status"]},
+                {row["_id"]: row["count"] for row in facets["by_day"]})
+
+    async def replace_counters(self, recounted: dict, expected_generation: int) -> Optional[dict]:
+        # A missing generation field counts as 0, like get_generation
+        generation = {"$in": [0, None]} if expected_generation == 0 else expected_generation
+        try:
+            return await self.db.application_counters.find_one_and_update(
+                {"_id": COUNTERS_ID, "generation": generation},
+                {"$set": recounted, "$inc": {"generation": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The counters document exists with another generation, so the upsert tried to insert a second one
+            return None
+
+    async def get_counters(self, daily_keys=None) -> Optional[dict]:
+        projection = None
+        if daily_keys is not None:
+            projection = {"generation": 1, "total": 1, "status": 1, **{f"daily.{key}": 1 for key in daily_keys}}
+        return await self.db.application_counters.find_one({"_id": COUNTERS_ID}, projection)
+
+    async def reserve_change_sequence(self, count: int = 1) -> int:
+        counters = await self.db.application_counters.find_one_and_update(
+            {"_id": COUNTERS_ID},
+            {"$inc": {"sequence": count}},
+            projection={"sequence": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counters["sequence"]
+
+    async def get_generation(self) -> int:
+        # Reads the small counters document, never the applications collection
+        counters = await self.db.application_counters.find_one({"_id": COUNTERS_ID}, {"generation": 1})
+        return counters.get("generation", 0) if counters else 0
+
+    async def insert_notification(self, notification: dict):
+        await self.db.notification_outbox.insert_one(dict(notification))
+
+    async def claim_notification(self, now, locked_until) -> Optional[dict]:
+        return await self.db.notification_outbox.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "sending", "locked_until": locked_until}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def update_notification(self, notification_id, state):
+        await self.db.notification_outbox.update_one({"id": notification_id}, {"$set": state})
+
+    async def notification_status_counts(self) -> Dict[str, int]:
+        counts = await self.db.notification_outbox.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        return {row["_id"]: row["count"] for row in counts}
+
+    async def count_notifications(self, status) -> int:
+        return await self.db.notification_outbox.count_documents({"status": status})
+
+    async def recent_failed_notifications(self, limit=20) -> List[dict]:
+        return await self.db.notification_outbox.find(
+            {"status": "failed"},
+            {"_id": 0, "id": 1, "kind": 1, "attempts": 1, "last_error": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(limit).to_list(length=limit)
+
+    async def insert_idempotency_key(self, key, record) -> bool:
+        # The key is the _id, so only one request can hold it
+        try:
+            await self.db.idempotency_keys.insert_one({"_id": key, **record})
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def get_idempotency_key(self, key) -> Optional[dict]:
+        return await self.db.idempotency_keys.find_one({"_id": key}, {"_id": 0})
+
+    async def extend_idempotency_lease(self, key, expected_locked_until, locked_until) -> bool:
+        result = await self.db.idempotency_keys.update_one(
+            {"_id": key, "status": "in_progress", "locked_until": expected_locked_until},
+            {"$set": {"locked_until": locked_until}}
+        )
+        return bool(result.modified_count)
+
+    async def complete_idempotency_key(self, key, response):
+        await self.db.idempotency_keys.update_one(
+            {"_id": key},
+            {"$set": {"status": "completed", "response": response, "locked_until": None}}
+        )
+
+    async def release_idempotency_key(self, key):
+        await self.db.idempotency_keys.delete_one({"_id": key, "status": "in_progress"})
+
+
+# In-memory
+def project(document: dict, fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        return dict(document)
+    return {field: document[field] for field in fields if field in document}
+
+
+def text_search_score(application: dict, terms: List[str]) -> float:
+    """Weighted count of query terms found in the searchable fields"""
+    score = 0.0
+    for field, weight in TEXT_SEARCH_WEIGHTS.items():
+        if application.get(field):
+            words = set(re.findall(r"\w+", application[field].lower()))
+            score += weight * sum(1 for term in terms if term in words)
+    return score
+
+
+class MemoryStorage(Storage):
+    """Process-local dictionaries; nothing survives a restart
+
+    Every method runs without awaiting, so each call is atomic on the event loop.
+    """
+
+    name = "memory"
+
+    def __init__(self, idempotency_ttl_seconds: int = 86400, notification_retention_seconds: int = 2592000):
+        self.idempotency_ttl = timedelta(seconds=idempotency_ttl_seconds)
+        self.notification_retention = timedelta(seconds=notification_retention_seconds)
+        self.status_checks: List[dict] = []
+        self.applications: Dict[str, dict] = {}
+        self.search_terms: Dict[str, List[str]] = {}
+        self.counters: Dict[str, object] = {}
+        self.notifications: Dict[str, dict] = {}
+        self.idempotency_keys: Dict[str, dict] = {}
+
+    async def describe_indexes(self) -> dict:
+        return {"indexes": {}, "builds_in_progress": []}
+
+    async def insert_status_check(self, status_check):
+        self.status_checks.append(dict(status_check))
+
+    async def list_status_checks(self, limit=1000):
+        return [dict(status_check) for status_check in self.status_checks[:limit]]
+
+    def _store_application(self, application: dict):
+        if application["id"] in self.applications:
+            raise ValueError(f"Duplicate application id {application['id']}")
+        self.applications[application["id"]] = dict(application)
+        self.search_terms[application["id"]] = application_search_terms(application)
+
+    async def insert_application(self, application):
+        self._store_application(application)
+
+    async def insert_applications(self, applications):
+        failed = {}
+        for index, application in enumerate(applications):
+            try:
+                self._store_application(application)
+            except ValueError as e:
+                failed[index] = str(e)
+        return failed
+
+    def _select(self, status=None, submitted_after=None, submitted_before=None) -> List[dict]:
+        """Matching applications newest first"""
+        submitted_after = naive_utc(submitted_after) if submitted_after else None
+        submitted_before = naive_utc(submitted_before) if submitted_before else None
+        selected = [
+            application for application in self.applications.values()
+            if (not status or application.get("status") == status)
+            and (submitted_after is None or application["submission_date"] >= submitted_after)
+            and (submitted_before is None or application["submission_date"] < submitted_before)
+        ]
+        selected.sort(key=lambda application: (application["submission_date"], application["id"]), reverse=True)
+        return selected
+
+    async def list_applications(self, status=None, submitted_after=None, submitted_before=None, after=None,
+                                skip=0, limit=100, fields=None):
+        selected = self._select(status, submitted_after, submitted_before)
+        if after:
+            after = (naive_utc(after[0]), after[1])
+            selected = [application for application in selected
+                        if (application["submission_date"], application["id"]) < after]
+        return [project(application, fields) for application in selected[skip:skip + limit]]
+
+    async def iter_applications(self, status=None, submitted_after=None, submitted_before=None, batch_size=500):
+        selected = self._select(status, submitted_after, submitted_before)
+        for start in range(0, len(selected), batch_size):
+            for application in selected[start:start + batch_size]:
+                yield dict(application)
+            # Let other requests run between batches of a large export
+            await asyncio.sleep(0)
+
+    async def get_application(self, application_id, fields=None):
+        application = self.applications.get(application_id)
+        return project(application, fields) if application is not None else None
+
+    async def update_application(self, application_id, update, versions=None):
+        application = self.applications.get(application_id)
+        if application is None or (versions is not None and application.get("version", 0) not in versions):
+            return None
+        previous = dict(application)
+        application.update(update)
+        application["version"] = previous.get("version", 0) + 1
+        return previous
+
+    async def find_application_statuses(self, ids=None, status=None, submitted_after=None, submitted_before=None,
+                                        limit=10000):
+        if ids is not None:
+            selected = [self.applications[i] for i in dict.fromkeys(ids) if i in self.applications]
+        else:
+            selected = self._select(status, submitted_after, submitted_before)
+        return [{"id": application["id"], "status": application.get("status")} for application in selected[:limit]]
+
+    async def update_applications_with_status(self, changes, previous_status, update):
+        modified = 0
+        for application_id, change_seq in changes:
+            application = self.applications.get(application_id)
+            if application is None or application.get("status") != previous_status:
+                continue
+            application.update(update)
+            application["change_seq"] = change_seq
+            application["version"] = application.get("version", 0) + 1
+            modified += 1
+        return modified
+
+    async def restamp_changes(self, changes, updated_at):
+        for application_id, change_seq in changes:
+            application = self.applications.get(application_id)
+            if application is not None and (application.get("change_seq") or 0) < change_seq:
+                application["change_seq"] = change_seq
+                application["updated_at"] = updated_at
+
+    async def search_applications_text(self, query, status=None, limit=20, fields=None):
+        terms = text_search_terms(query)
+        scored = []
+        for application in self._select(status):
+            score = text_search_score(application, terms)
+            if score:
+                scored.append((score, application))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return [{**project(application, fields), "score": score} for score, application in scored[:limit]]
+
+    async def search_applications_prefix(self, prefixes, status=None, limit=20, fields=None):
+        results = []
+        for application in self.applications.values():
+            if status and application.get("status") != status:
+                continue
+            terms = self.search_terms[application["id"]]
+            if all(any(term.startswith(prefix) for term in terms) for prefix in prefixes):
+                results.append(project(application, fields))
+                if len(results) >= limit:
+                    break
+        return results
+
+    async def application_changes(self, since, limit, fields=None):
+        changed = sorted(
+            (application for application in self.applications.values() if (application.get("change_seq") or 0) > since),
+            key=lambda application: application["change_seq"]
+        )
+        return [project(application, fields) for application in changed[:limit]]
+
+    async def increment_counters(self, deltas):
+        for key, delta in deltas.items():
+            self.counters[key] = self.counters.get(key, 0) + delta
+
+    async def count_applications(self):
+        by_status = Counter(application.get("status") for application in self.applications.values())
+        by_day = Counter(application["submission_date"].strftime("%Y-%m-%d") for application in self.applications.values())
+        return dict(by_status), dict(by_day)
+
+    async def replace_counters(self, recounted, expected_generation):
+        if self.counters.get("generation", 0) != expected_generation:
+            return None
+        self.counters = {key: value for key, value in self.counters.items()
+                         if key in ("generation", "sequence")}
+        self.counters["total"] = recounted["total"]
+        self.counters["reconciled_at"] = recounted["reconciled_at"]
+        for group in ("status", "daily"):
+            for key, value in recounted[group].items():
+                self.counters[f"{group}.{key}"] = value
+        self.counters["generation"] = self.counters.get("generation", 0) + 1
+        return nest_counters(self.counters)
+
+    async def get_counters(self, daily_keys=None):
+        if not self.counters:
+            return None
+        counters = nest_counters(self.counters)
+        if daily_keys is not None:
+            counters["daily"] = {key: count for key, count in counters.get("daily", {}).items() if key in daily_keys}
+        return counters
+
+    async def reserve_change_sequence(self, count=1):
+        self.counters["sequence"] = self.counters.get("sequence", 0) + count
+        return self.counters["sequence"]
+
+    async def get_generation(self):
+        return self.counters.get("generation", 0)
+
+    async def insert_notification(self, notification):
+        expired_before = datetime.utcnow() - self.notification_retention
+        for notification_id in [notification_id for notification_id, existing in self.notifications.items()
+                                if existing.get("finished_at") and existing["finished_at"] < expired_before]:
+            del self.notifications[notification_id]
+        self.notifications[notification["id"]] = copy.deepcopy(notification)
+
+    async def claim_notification(self, now, locked_until):
+        due = [
+            notification for notification in self.notifications.values()
+            if (notification["status"] == "pending" and notification["next_attempt_at"] <= now)
+            or (notification["status"] == "sending" and notification["locked_until"] < now)
+        ]
+        if not due:
+            return None
+        notification = min(due, key=lambda candidate: candidate["next_attempt_at"])
+        notification.update({"status": "sending", "locked_until": locked_until, "attempts": notification["attempts"] + 1})
+        return copy.deepcopy(notification)
+
+    async def update_notification(self, notification_id, state):
+        if notification_id in self.notifications:
+            self.notifications[notification_id].update(state)
+
+    async def notification_status_counts(self):
+        return dict(Counter(notification["status"] for notification in self.notifications.values()))
+
+    async def count_notifications(self, status):
+        return sum(1 for notification in self.notifications.values() if notification["status"] == status)
+
+    async def recent_failed_notifications(self, limit=20):
+        failed = [notification for notification in self.notifications.values() if notification["status"] == "failed"]
+        failed.sort(key=lambda notification: notification["created_at"], reverse=True)
+        return [{key: notification.get(key) for key in ("id", "kind", "attempts", "last_error", "created_at")}
+                for notification in failed[:limit]]
+
+    def _live_idempotency_key(self, key) -> Optional[dict]:
+        record = self.idempotency_keys.get(key)
+        if record is not None and record["created_at"] < datetime.utcnow() - self.idempotency_ttl:
+            del self.idempotency_keys[key]
+            return None
+        return record
+
+    async def insert_idempotency_key(self, key, record):
+        if self._live_idempotency_key(key) is not None:
+            return False
+        self.idempotency_keys[key] = copy.deepcopy(record)
+        return True
+
+    async def get_idempotency_key(self, key):
+        record = self._live_idempotency_key(key)
+        return copy.deepcopy(record) if record is not None else None
+
+    async def extend_idempotency_lease(self, key, expected_locked_until, locked_until):
+        record = self._live_idempotency_key(key)
+        if record is None or record["status"] != "in_progress" or record["locked_until"] != expected_locked_until:
+            return False
+        record["locked_until"] = locked_until
+        return True
+
+    async def complete_idempotency_key(self, key, response):
+        record = self._live_idempotency_key(key)
+        if record is not None:
+            record.update({"status": "completed", "response": copy.deepcopy(response), "locked_until": None})
+
+    async def release_idempotency_key(self, key):
+        record = self._live_idempotency_key(key)
+        if record is not None and record["status"] == "in_progress":
+            del self.idempotency_keys[key]
+
+
+# SQLite
+# Datetimes are stored as fixed-width ISO strings, so they sort and compare as text.
+# Nested payloads (notification payloads, idempotent responses) are stored as BSON so
+# they round-trip with the same types Mongo would return.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT,
+    phone TEXT,
+    business_name TEXT,
+    service_interest TEXT,
+    funding_amount TEXT,
+    time_in_business TEXT,
+    submission_date TEXT NOT NULL,
+    status TEXT,
+    notes TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    change_seq INTEGER
+);
+CREATE INDEX IF NOT EXISTS applications_status_submission_date ON applications (status, submission_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS applications_submission_date ON applications (submission_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS applications_change_seq ON applications (change_seq);
+CREATE TABLE IF NOT EXISTS application_terms (
+    term TEXT NOT NULL,
+    application_id TEXT NOT NULL,
+    PRIMARY KEY (term, application_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS status_checks (
+    id TEXT PRIMARY KEY,
+    client_name TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS status_checks_timestamp ON status_checks (timestamp);
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    value
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload BLOB,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    next_attempt_at TEXT,
+    locked_until TEXT,
+    last_error TEXT,
+    sent_at TEXT,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS notification_outbox_status_next_attempt ON notification_outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS notification_outbox_status_locked_until ON notification_outbox (status, locked_until);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    locked_until TEXT,
+    response BLOB
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_created_at ON idempotency_keys (created_at);
+"""
+
+# Full-text index kept in step with applications by triggers
+SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+    first_name, last_name, email, business_name, notes, content='applications', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS applications_fts_insert AFTER INSERT ON applications BEGIN
+    INSERT INTO applications_fts (rowid, first_name, last_name, email, business_name, notes)
+    VALUES (new.rowid, new.first_name, new.last_name, new.email, new.business_name, new.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS applications_fts_delete AFTER DELETE ON applications BEGIN
+    INSERT INTO applications_fts (applications_fts, rowid, first_name, last_name, email, business_name, notes)
+    VALUES ('delete', old.rowid, old.first_name, old.last_name, old.email, old.business_name, old.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS applications_fts_update AFTER UPDATE ON applications BEGIN
+    INSERT INTO applications_fts (applications_fts, rowid, first_name, last_name, email, business_name, notes)
+    VALUES ('delete', old.rowid, old.first_name, old.last_name, old.email, old.business_name, old.notes);
+    INSERT INTO applications_fts (rowid, first_name, last_name, email, business_name, notes)
+    VALUES (new.rowid, new.first_name, new.last_name, new.email, new.business_name, new.notes);
+END;
+"""
+
+SQLITE_DATETIME_COLUMNS = {"submission_date", "updated_at", "timestamp", "created_at", "next_attempt_at",
+                           "locked_until", "sent_at", "finished_at", "reconciled_at"}
+SQLITE_BSON_COLUMNS = {"payload", "response"}
+NOTIFICATION_COLUMNS = ["id", "kind", "payload", "status", "attempts", "created_at", "next_attempt_at",
+                        "locked_until", "last_error", "sent_at", "finished_at"]
+
+
+def sqlite_value(column: str, value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return naive_utc(value).strftime("%Y-%m-%dT%H:%M:%S.%f")
+    if column in SQLITE_BSON_COLUMNS:
+        return bson.encode(value)
+    return value
+
+
+def sqlite_document(row: sqlite3.Row, fields: Optional[List[str]] = None) -> dict:
+    document = {}
+    for column in row.keys():
+        if fields is not None and column not in fields and column != "score":
+            continue
+        value = row[column]
+        if value is not None:
+            if column in SQLITE_DATETIME_COLUMNS:
+                value = datetime.fromisoformat(value)
+            elif column in SQLITE_BSON_COLUMNS:
+                value = bson.decode(value)
+        document[column] = value
+    return document
+
+
+def sqlite_application_filter(status=None, submitted_after=None, submitted_before=None) -> Tuple[List[str], list]:
+    clauses, parameters = [], []
+    if status:
+        clauses.append("status = ?")
+        parameters.append(status)
+    if submitted_after:
+        clauses.append("submission_date >= ?")
+        parameters.append(sqlite_value("submission_date", submitted_after))
+    if submitted_before:
+        clauses.append("submission_date < ?")
+        parameters.append(sqlite_value("submission_date", submitted_before))
+    return clauses, parameters
+
+
+def where(clauses: List[str]) -> str:
+    return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+
+class SQLiteStorage(Storage):
+    """A single SQLite file
+
+    The connection lives on one dedicated thread, so statements never block the
+    event loop and never run concurrently within the process. Multi-statement
+    writes take the database write lock (BEGIN IMMEDIATE), so several processes
+    can share the file.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, idempotency_ttl_seconds: int = 86400, notification_retention_seconds: int = 2592000):
+        self.path = path
+        self.idempotency_ttl = timedelta(seconds=idempotency_ttl_seconds)
+        self.notification_retention = timedelta(seconds=notification_retention_seconds)
+        self.full_text = True
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SQLITE_SCHEMA)
+            # Outbox tables created before finished_at existed
+            outbox_columns = {row["name"] for row in connection.execute("PRAGMA table_info(notification_outbox)")}
+            if "finished_at" not in outbox_columns:
+                connection.execute("ALTER TABLE notification_outbox ADD COLUMN finished_at TEXT")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS notification_outbox_finished_at ON notification_outbox (finished_at)"
+            )
+            try:
+                connection.executescript(SQLITE_FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                # SQLite built without FTS5 - text search falls back to scoring in Python
+                logger.warning(f"SQLite full-text search unavailable: {str(e)}")
+                self.full_text = False
+            self._connection = connection
+        return self._connection
+
+    async def _run(self, function, *args):
+        """Run function(connection, *args) on the SQLite thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: function(self._connect(), *args))
+
+    @staticmethod
+    def _transaction(connection: sqlite3.Connection, function, *args):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = function(connection, *args)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return result
+
+    async def _write(self, function, *args):
+        """Run function(connection, *args) as one write transaction"""
+        return await self._run(self._transaction, function, *args)
+
+    async def prepare(self):
+        await self._run(lambda connection: None)
+
+    async def close(self):
+        """Close the connection; the next call reopens it"""
+        def close(connection):
+            connection.close()
+            self._connection = None
+        if self._connection is not None:
+            await self._run(close)
+
+    async def describe_indexes(self):
+        def describe(connection):
+            rows = connection.execute(
+                "SELECT tbl_name, name FROM sqlite_master WHERE type = 'index' ORDER BY tbl_name, name"
+            ).fetchall()
+            indexes = {}
+            for row in rows:
+                indexes.setdefault(row["tbl_name"], []).append(row["name"])
+            return indexes
+        return {"indexes": await self._run(describe), "builds_in_progress": []}
+
+    async def insert_status_check(self, status_check):
+        def insert(connection):
+            connection.execute(
+                "INSERT INTO status_checks (id, client_name, timestamp) VALUES (?, ?, ?)",
+                (status_check["id"], status_check["client_name"], sqlite_value("timestamp", status_check["timestamp"]))
+            )
+        await self._run(insert)
+
+    async def list_status_checks(self, limit=1000):
+        def select(connection):
+            return [sqlite_document(row) for row in
+                    connection.execute("SELECT * FROM status_checks ORDER BY rowid LIMIT ?", (limit,))]
+        return await self._run(select)
+
+    @staticmethod
+    def _insert_application(connection: sqlite3.Connection, application: dict):
+        columns = [field for field in APPLICATION_FIELDS if field in application]
+        connection.execute(
+            f"INSERT INTO applications ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            [sqlite_value(column, application[column]) for column in columns]
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO application_terms (term, application_id) VALUES (?, ?)",
+            [(term, application["id"]) for term in application_search_terms(application)]
+        )
+
+    async def insert_application(self, application):
+        await self._write(self._insert_application, application)
+
+    async def insert_applications(self, applications):
+        def insert(connection):
+            failed = {}
+            for index, application in enumerate(applications):
+                connection.execute("SAVEPOINT application")
+                try:
+                    self._insert_application(connection, application)
+                    connection.execute("RELEASE application")
+                except sqlite3.Error as e:
+                    connection.execute("ROLLBACK TO application")
+                    connection.execute("RELEASE application")
+                    failed[index] = str(e)
+            return failed
+        return await self._write(insert)
+
+    async def list_applications(self, status=None, submitted_after=None, submitted_before=None, after=None,
+                                skip=0, limit=100, fields=None):
+        clauses, parameters = sqlite_application_filter(status, submitted_after, submitted_before)
+        if after:
+            after_date = sqlite_value("submission_date", after[0])
+            clauses.append("(submission_date < ? OR (submission_date = ? AND id < ?))")
+            parameters.extend([after_date, after_date, after[1]])
+
+        def select(connection):
+            rows = connection.execute(
+                f"SELECT * FROM applications{where(clauses)} ORDER BY submission_date DESC, id DESC LIMIT ? OFFSET ?",
+                [*parameters, limit, skip]
+            )
+            return [sqlite_document(row, fields) for row in rows]
+        return await self._run(select)
+
+    async def iter_applications(self, status=None, submitted_after=None, submitted_before=None, batch_size=500):
+        after = None
+        while True:
+            batch = await self.list_applications(status, submitted_after, submitted_before, after=after, limit=batch_size)
+            for application in batch:
+                yield application
+            if len(batch) < batch_size:
+                break
+            after = (batch[-1]["submission_date"], batch[-1]["id"])
+
+    async def get_application(self, application_id, fields=None):
+        def select(connection):
+            row = connection.execute("SELECT * FROM applications WHERE id = ?", (application_id,)).fetchone()
+            return sqlite_document(row, fields) if row is not None else None
+        return await self._run(select)
+
+    async def update_application(self, application_id, update, versions=None):
+        def apply(connection):
+            row = connection.execute("SELECT * FROM applications WHERE id = ?", (application_id,)).fetchone()
+            if row is None or (versions is not None and row["version"] not in versions):
+                return None
+            connection.execute(
+                f"UPDATE applications SET {', '.join(f'{column} = ?' for column in update)}, version = version + 1 WHERE id = ?",
+                [*(sqlite_value(column, value) for column, value in update.items()), application_id]
+            )
+            return sqlite_document(row)
+        return await self._write(apply)
+
+    async def find_application_statuses(self, ids=None, status=None, submitted_after=None, submitted_before=None,
+                                        limit=10000):
+        def select(connection):
+            if ids is not None:
+                found = []
+                unique_ids = list(dict.fromkeys(ids))
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(unique_ids), 500):
+                    batch = unique_ids[start:start + 500]
+                    found.extend(connection.execute(
+                        f"SELECT id, status FROM applications WHERE id IN ({', '.join('?' for _ in batch)})", batch
+                    ))
+                rows = found[:limit]
+            else:
+                clauses, parameters = sqlite_application_filter(status, submitted_after, submitted_before)
+                rows = connection.execute(f"SELECT id, status FROM applications{where(clauses)} LIMIT ?", [*parameters, limit])
+            return [{"id": row["id"], "status": row["status"]} for row in rows]
+        return await self._run(select)
+
+    async def update_applications_with_status(self, changes, previous_status, update):
+        assignments = ", ".join(f"{column} = ?" for column in update)
+        values = [sqlite_value(column, value) for column, value in update.items()]
+
+        def apply(connection):
+            modified = 0
+            for application_id, change_seq in changes:
+                cursor = connection.execute(
+                    f"UPDATE applications SET {assignments}, change_seq = ?, version = version + 1 "
+                    f"WHERE id = ? AND status IS ?",
+                    [*values, change_seq, application_id, previous_status]
+                )
+                modified += cursor.rowcount
+            return modified
+        return await self._write(apply)
+
+    async def restamp_changes(self, changes, updated_at):
+        def apply(connection):
+            connection.executemany(
+                "UPDATE applications SET change_seq = ?, updated_at = ? WHERE id = ? AND change_seq < ?",
+                [(change_seq, sqlite_value("updated_at", updated_at), application_id, change_seq)
+                 for application_id, change_seq in changes]
+            )
+        await self._write(apply)
+
+    async def search_applications_text(self, query, status=None, limit=20, fields=None):
+        terms = text_search_terms(query)
+        if not terms:
+            return []
+        if not self.full_text:
+            return await self._search_text_scan(terms, status, limit, fields)
+
+        match = " OR ".join(f'"{term}"' for term in terms)
+        # bm25 weights follow the fts5 column order; lower bm25 is better, so negate it into a score
+        weights = ", ".join(str(float(TEXT_SEARCH_WEIGHTS[column]))
+                            for column in ("first_name", "last_name", "email", "business_name", "notes"))
+        clauses = ["applications_fts MATCH ?"]
+        parameters = [match]
+        if status:
+            clauses.append("applications.status = ?")
+            parameters.append(status)
+
+        def select(connection):
+            rows = connection.execute(
+                f"SELECT applications.*, -bm25(applications_fts, {weights}) AS score FROM applications_fts "
+                f"JOIN applications ON applications.rowid = applications_fts.rowid{where(clauses)} "
+                f"ORDER BY score DESC LIMIT ?",
+                [*parameters, limit]
+            )
+            return [sqlite_document(row, fields) for row in rows]
+        return await self._run(select)
+
+    async def _search_text_scan(self, terms, status, limit, fields):
+        clauses, parameters = sqlite_application_filter(status)
+
+        def select(connection):
+            scored = []
+            for row in connection.execute(f"SELECT * FROM applications{where(clauses)}", parameters):
+                application = sqlite_document(row)
+                score = text_search_score(application, terms)
+                if score:
+                    scored.append((score, application))
+            scored.sort(key=lambda pair: pair[0], reverse=True)
+            return [{**project(application, fields), "score": score} for score, application in scored[:limit]]
+        return await self._run(select)
+
+    async def search_applications_prefix(self, prefixes, status=None, limit=20, fields=None):
+        clauses, parameters = sqlite_application_filter(status)
+        for prefix in prefixes:
+            # A range on the term primary key, so each prefix is an index seek
+            clauses.append("id IN (SELECT application_id FROM application_terms WHERE term >= ? AND term < ?)")
+            parameters.extend([prefix, prefix + "\U0010ffff"])
+
+        def select(connection):
+            rows = connection.execute(f"SELECT * FROM applications{where(clauses)} LIMIT ?", [*parameters, limit])
+            return [sqlite_document(row, fields) for row in rows]
+        return await self._run(select)
+
+    async def application_changes(self, since, limit, fields=None):
+        def select(connection):
+            rows = connection.execute(
+                "SELECT * FROM applications WHERE change_seq > ? ORDER BY change_seq LIMIT ?", (since, limit)
+            )
+            return [sqlite_document(row, fields) for row in rows]
+        return await self._run(select)
+
+    @staticmethod
+    def _increment(connection: sqlite3.Connection, deltas: dict):
+        connection.executemany(
+            "INSERT INTO counters (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            list(deltas.items())
+        )
+
+    @staticmethod
+    def _counters(connection: sqlite3.Connection) -> dict:
+        flat = {}
+        for row in connection.execute("SELECT key, value FROM counters"):
+            value = row["value"]
+            flat[row["key"]] = datetime.fromisoformat(value) if row["key"] in SQLITE_DATETIME_COLUMNS and value else value
+        return nest_counters(flat)
+
+    async def increment_counters(self, deltas):
+        await self._write(self._increment, deltas)
+
+    async def count_applications(self):
+        def count(connection):
+            by_status = {row[0]: row[1] for row in
+                         connection.execute("SELECT status, COUNT(*) FROM applications GROUP BY status")}
+            by_day = {row[0]: row[1] for row in
+                      connection.execute("SELECT substr(submission_date, 1, 10), COUNT(*) FROM applications GROUP BY 1")}
+            return by_status, by_day
+        return await self._run(count)
+
+    async def replace_counters(self, recounted, expected_generation):
+        def replace(connection):
+            row = connection.execute("SELECT value FROM counters WHERE key = 'generation'").fetchone()
+            if (row[0] if row else 0) != expected_generation:
+                return None
+            connection.execute("DELETE FROM counters WHERE key NOT IN ('generation', 'sequence')")
+            rows = [("total", recounted["total"]),
+                    ("reconciled_at", sqlite_value("reconciled_at", recounted["reconciled_at"]))]
+            for group in ("status", "daily"):
+                rows.extend((f"{group}.{key}", value) for key, value in recounted[group].items())
+            connection.executemany("INSERT INTO counters (key, value) VALUES (?, ?)", rows)
+            self._increment(connection, {"generation": 1})
+            return self._counters(connection)
+        return await self._write(replace)
+
+    async def get_counters(self, daily_keys=None):
+        def select(connection):
+            counters = self._counters(connection)
+            if not counters:
+                return None
+            if daily_keys is not None:
+                counters["daily"] = {key: count for key, count in counters.get("daily", {}).items() if key in daily_keys}
+            return counters
+        return await self._run(select)
+
+    async def reserve_change_sequence(self, count=1):
+        def reserve(connection):
+            self._increment(connection, {"sequence": count})
+            return connection.execute("SELECT value FROM counters WHERE key = 'sequence'").fetchone()[0]
+        return await self._write(reserve)
+
+    async def get_generation(self):
+        def select(connection):
+            row = connection.execute("SELECT value FROM counters WHERE key = 'generation'").fetchone()
+            return row[0] if row else 0
+        return await self._run(select)
+
+    async def insert_notification(self, notification):
+        def insert(connection):
+            expired_before = sqlite_value("finished_at", datetime.utcnow() - self.notification_retention)
+            connection.execute("DELETE FROM notification_outbox WHERE finished_at < ?", (expired_before,))
+            connection.execute(
+                f"INSERT INTO notification_outbox ({', '.join(NOTIFICATION_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in NOTIFICATION_COLUMNS)})",
+                [sqlite_value(column, notification.get(column)) for column in NOTIFICATION_COLUMNS]
+            )
+        await self._run(insert)
+
+    async def claim_notification(self, now, locked_until):
+        def claim(connection):
+            now_value = sqlite_value("next_attempt_at", now)
+            row = connection.execute(
+                "SELECT id FROM notification_outbox "
+                "WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'sending' AND locked_until < ?) "
+                "ORDER BY next_attempt_at LIMIT 1",
+                (now_value, now_value)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE notification_outbox SET status = 'sending', locked_until = ?, attempts = attempts + 1 WHERE id = ?",
+                (sqlite_value("locked_until", locked_until), row["id"])
+            )
+            return sqlite_document(connection.execute("SELECT * FROM notification_outbox WHERE id = ?", (row["id"],)).fetchone())
+        return await self._write(claim)
+
+    async def update_notification(self, notification_id, state):
+        columns = [column for column in state if column in NOTIFICATION_COLUMNS]
+
+        def update(connection):
+            connection.execute(
+                f"UPDATE notification_outbox SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                [*(sqlite_value(column, state[column]) for column in columns), notification_id]
+            )
+        await self._run(update)
+
+    async def notification_status_counts(self):
+        def count(connection):
+            return {row[0]: row[1] for row in
+                    connection.execute("SELECT status, COUNT(*) FROM notification_outbox GROUP BY status")}
+        return await self._run(count)
+
+    async def count_notifications(self, status):
+        def count(connection):
+            return connection.execute("SELECT COUNT(*) FROM notification_outbox WHERE status = ?", (status,)).fetchone()[0]
+        return await self._run(count)
+
+    async def recent_failed_notifications(self, limit=20):
+        def select(connection):
+            rows = connection.execute(
+                "SELECT id, kind, attempts, last_error, created_at FROM notification_outbox "
+                "WHERE status = 'failed' ORDER BY created_at DESC LIMIT ?", (limit,)
+            )
+            return [sqlite_document(row) for row in rows]
+        return await self._run(select)
+
+    async def insert_idempotency_key(self, key, record):
+        def insert(connection):
+            expired_before = sqlite_value("created_at", datetime.utcnow() - self.idempotency_ttl)
+            connection.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (expired_before,))
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (key, fingerprint, status, created_at, locked_until, response) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [key, *(sqlite_value(column, record.get(column))
+                        for column in ("fingerprint", "status", "created_at", "locked_until", "response"))]
+            )
+            return cursor.rowcount == 1
+        return await self._write(insert)
+
+    async def get_idempotency_key(self, key):
+        def select(connection):
+            row = connection.execute(
+                "SELECT fingerprint, status, created_at, locked_until, response FROM idempotency_keys "
+                "WHERE key = ? AND created_at >= ?",
+                (key, sqlite_value("created_at", datetime.utcnow() - self.idempotency_ttl))
+            ).fetchone()
+            return sqlite_document(row) if row is not None else None
+        return await self._run(select)
+
+    async def extend_idempotency_lease(self, key, expected_locked_until, locked_until):
+        def extend(connection):
+            cursor = connection.execute(
+                "UPDATE idempotency_keys SET locked_until = ? WHERE key = ? AND status = 'in_progress' AND locked_until = ?",
+                (sqlite_value("locked_until", locked_until), key, sqlite_value("locked_until", expected_locked_until))
+            )
+            return cursor.rowcount == 1
+        return await self._run(extend)
+
+    async def complete_idempotency_key(self, key, response):
+        def complete(connection):
+            connection.execute(
+                "UPDATE idempotency_keys SET status = 'completed', response = ?, locked_until = NULL WHERE key = ?",
+                (sqlite_value("response", response), key)
+            )
+        await self._run(complete)
+
+    async def release_idempotency_key(self, key):
+        def release(connection):
+            connection.execute("DELETE FROM idempotency_keys WHERE key = ? AND status = 'in_progress'", (key,))
+        await self._run(release)
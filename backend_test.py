@@ -109,14 +109,14 @@ def test_get_applications():
     
     try:
         # Test getting all applications
-        response = requests.get(f"{API_BASE_URL}/applications", timeout=10)
+        response = requests.get(f"{API_BASE_URL}/applications", auth=(ADMIN_USERNAME, ADMIN_PASSWORD), timeout=10)
         
         if response.status_code == 200:
             applications = response.json()
             print(f"✅ Retrieved {len(applications)} applications")
             
             # Test with status filter
-            response_pending = requests.get(f"{API_BASE_URL}/applications?status=pending", timeout=10)
+            response_pending = requests.get(f"{API_BASE_URL}/applications?status=pending", auth=(ADMIN_USERNAME, ADMIN_PASSWORD), timeout=10)
             if response_pending.status_code == 200:
                 pending_apps = response_pending.json()
                 print(f"✅ Retrieved {len(pending_apps)} pending applications")
@@ -139,7 +139,7 @@ def test_application_stats():
     print("\n🔍 Testing application stats endpoint...")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/applications/stats/summary", timeout=10)
+        response = requests.get(f"{API_BASE_URL}/applications/stats/summary", auth=(ADMIN_USERNAME, ADMIN_PASSWORD), timeout=10)
         
         if response.status_code == 200:
             stats = response.json()
@@ -202,7 +202,7 @@ def test_database_connectivity():
     
     try:
         # Use the stats endpoint as a proxy for database connectivity
-        response = requests.get(f"{API_BASE_URL}/applications/stats/summary", timeout=10)
+        response = requests.get(f"{API_BASE_URL}/applications/stats/summary", auth=(ADMIN_USERNAME, ADMIN_PASSWORD), timeout=10)
         
         if response.status_code == 200:
             stats = response.json()
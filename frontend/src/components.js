@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { 
   ChevronDownIcon, 
@@ -1068,8 +1068,11 @@ export const ApplicationModal = ({ isOpen, onClose }) => {
     monthlyRevenue: '',
     creditScore: ''
   });
+  // One key per filled-in form, so double-clicks and retries don't create duplicates
+  const idempotencyKey = useRef(null);
 
   const handleInputChange = (e) => {
+    idempotencyKey.current = null;
     setFormData({
       ...formData,
       [e.target.name]: e.target.value
@@ -1097,11 +1100,18 @@ export const ApplicationModal = ({ isOpen, onClose }) => {
       // Get backend URL from environment
       const backendUrl = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
       
+      if (!idempotencyKey.current) {
+        idempotencyKey.current = window.crypto && window.crypto.randomUUID
+          ? window.crypto.randomUUID()
+          : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+      }
+
       // Submit to backend
       const response = await fetch(`${backendUrl}/api/applications/submit`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Idempotency-Key': idempotencyKey.current,
         },
         body: JSON.stringify(submissionData)
       });
@@ -1113,6 +1123,7 @@ export const ApplicationModal = ({ isOpen, onClose }) => {
         
         // Reset form after 3 seconds
         setTimeout(() => {
+          idempotencyKey.current = null;
           onClose();
           setStep(1);
           setSubmitSuccess(false);
@@ -0,0 +1,112 @@
+"""Shared fixtures: the API served in-process over a fresh MemoryStorage or SQLiteStorage"""
+import os
+import socket
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# server.py reads its settings at import time
+os.environ.update({
+    "MONGO_URL": "mongodb://localhost:27017",
+    "DB_NAME": "money_mornings_test",
+    "STORAGE_BACKEND": "memory",
+    "ADMIN_USERNAME": "admin",
+    "ADMIN_PASSWORD": "test-password",
+    "SUBMIT_RATE_PER_MINUTE": "0",
+    "NOTIFICATION_WORKERS": "0",  # tests deliver the outbox themselves
+    "COUNTERS_RECONCILE_INTERVAL": "0",
+    "CHANGES_SETTLE_SECONDS": "0",
+})
+
+import server  # noqa: E402
+from storage import MemoryStorage, MongoStorage, SQLiteStorage  # noqa: E402
+
+ADMIN_AUTH = ("admin", "test-password")
+
+def application_payload(number: int = 0, **overrides) -> dict:
+    """A valid submission body; number keeps applicants apart"""
+    return {
+        "first_name": f"Test{number}",
+        "last_name": "Applicant",
+        "email": f"applicant{number}@example.com",
+        "phone": "555-0100",
+        "business_name": f"Business {number}",
+        "service_interest": "Business Funding",
+        "funding_amount": "$50,000",
+        "time_in_business": "2 years",
+        **overrides,
+    }
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(params=["memory", "sqlite", "mongomock"])
+async def storage(request, tmp_path, monkeypatch):
+    """Run the app's lifespan against an empty storage backend"""
+    if request.param == "memory":
+        backend = MemoryStorage()
+    elif request.param == "sqlite":
+        backend = SQLiteStorage(str(tmp_path / "money_mornings.sqlite3"))
+    else:
+        # MongoStorage, the production backend, against an in-process fake server
+        mongomock_motor = pytest.importorskip("mongomock_motor")
+        backend = MongoStorage(mongomock_motor.AsyncMongoMockClient(), "money_mornings_test")
+    monkeypatch.setattr(server, "storage", backend)
+    # Caches are module globals; start every test cold
+    monkeypatch.setattr(server, "application_cache", server.ReadThroughCache(
+        server.APPLICATION_CACHE_TTL_SECONDS, server.APPLICATION_CACHE_MAX_BYTES))
+    monkeypatch.setattr(server, "application_list_cache", server.ReadThroughCache(
+        server.APPLICATION_CACHE_TTL_SECONDS, server.APPLICATION_LIST_CACHE_MAX_BYTES))
+
+    async with server.app.router.lifespan_context(server.app):
+        await server.index_provisioning_task
+        yield backend
+
+@pytest.fixture
+async def client(storage):
+    """HTTP client calling the app in-process with admin credentials"""
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver", auth=ADMIN_AUTH) as client:
+        yield client
+
+class SMTPSink:
+    """aiosmtpd handler that keeps accepted messages, or rejects them while reject is set"""
+
+    def __init__(self):
+        self.messages = []
+        self.reject = False
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reject:
+            return "451 Requested action aborted: try again later"
+        self.messages.append(envelope.content.decode("utf8", errors="replace"))
+        return "250 Message accepted for delivery"
+
+@pytest.fixture
+def smtp_sink(monkeypatch):
+    """Local unauthenticated SMTP server, with the app configured to deliver to it"""
+    aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    sink = SMTPSink()
+    controller = aiosmtpd_controller.Controller(sink, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    for name in ("SMTP_USERNAME", "SMTP_PASSWORD", "SMTP_FROM"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(port))
+    monkeypatch.setenv("SMTP_STARTTLS", "false")
+    monkeypatch.setenv("SMTP_ALLOW_UNAUTHENTICATED", "true")
+    monkeypatch.setenv("NOTIFICATION_EMAIL", "admin@example.com")
+    yield sink
+    controller.stop()
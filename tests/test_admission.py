@@ -0,0 +1,51 @@
+"""Submit admission control: per-client rate limit behind a trusted proxy"""
+from collections import OrderedDict
+
+import pytest
+
+import server
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+def rate_limited(monkeypatch):
+    """Two submits per client, then one more per minute"""
+    monkeypatch.setattr(server.submit_admission, "rate", 1 / 60)
+    monkeypatch.setattr(server.submit_admission, "burst", 2)
+    monkeypatch.setattr(server.submit_admission, "_buckets", OrderedDict())
+    monkeypatch.setattr(server.submit_admission, "rejected", {"rate_limited": 0, "overloaded": 0})
+
+async def submit(client, number: int, forwarded_for: str = None):
+    headers = {"X-Forwarded-For": forwarded_for} if forwarded_for else {}
+    return await client.post("/api/applications/submit", json=application_payload(number), headers=headers)
+
+async def test_client_over_its_rate_gets_429_with_retry_after(client, rate_limited):
+    assert (await submit(client, 0)).status_code == 200
+    assert (await submit(client, 1)).status_code == 200
+
+    response = await submit(client, 2)
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["retry-after"]) <= 60
+    assert server.submit_admission.stats()["rejected"]["rate_limited"] == 1
+
+async def test_clients_behind_a_trusted_proxy_are_limited_separately(client, rate_limited, monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", 1)
+
+    for number in range(2):
+        assert (await submit(client, number, "203.0.113.7")).status_code == 200
+    assert (await submit(client, 2, "203.0.113.7")).status_code == 429
+    assert (await submit(client, 3, "198.51.100.20")).status_code == 200
+
+async def test_client_written_forwarded_entries_are_ignored(client, rate_limited, monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", 1)
+
+    # Rotating a leftmost entry does not give the client a fresh bucket
+    for number, spoofed in enumerate(["10.0.0.1", "10.0.0.2", "10.0.0.3"]):
+        response = await submit(client, number, f"{spoofed}, 203.0.113.7")
+    assert response.status_code == 429
+
+async def test_forwarded_for_is_ignored_without_a_trusted_proxy(client, rate_limited):
+    assert (await submit(client, 0, "203.0.113.7")).status_code == 200
+    assert (await submit(client, 1, "198.51.100.20")).status_code == 200
+    assert (await submit(client, 2, "192.0.2.55")).status_code == 429
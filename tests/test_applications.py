@@ -0,0 +1,245 @@
+"""Application list paging, conditional updates and the materialized stats counters"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+import server
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+async def submit(client, number: int) -> dict:
+    response = await client.post("/api/applications/submit", json=application_payload(number))
+    assert response.status_code == 200
+    return response.json()
+
+async def stats(client) -> dict:
+    response = await client.get("/api/applications/stats/summary")
+    assert response.status_code == 200
+    return response.json()
+
+async def reconciled_counts(client) -> dict:
+    """Status counts from a full recount, to check the counters against"""
+    response = await client.post("/api/admin/counters/reconcile")
+    assert response.status_code == 200
+    return response.json()["status_counts"]
+
+# Keyset cursor paging
+async def test_cursor_pages_return_every_application_once(client, storage):
+    # Several applications share a submission_date so the id tie-breaker is exercised
+    base = server.mongo_utcnow() - timedelta(hours=1)
+    documents = []
+    for number in range(11):
+        document = server.new_application_document(server.ApplicationSubmissionCreate(**application_payload(number)))
+        document["submission_date"] = base + timedelta(minutes=number // 3)
+        documents.append(document)
+    await storage.insert_applications(documents)
+
+    expected = [d["id"] for d in sorted(documents, key=lambda d: (d["submission_date"], d["id"]), reverse=True)]
+
+    seen = []
+    params = {"limit": 4}
+    while True:
+        response = await client.get("/api/applications", params=params)
+        assert response.status_code == 200
+        seen += [application["id"] for application in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        params = {"limit": 4, "cursor": cursor}
+
+    assert seen == expected
+
+async def test_cursor_pages_respect_the_status_filter(client):
+    submitted = [await submit(client, number) for number in range(5)]
+    for application in submitted[::2]:
+        response = await client.put(f"/api/applications/{application['id']}", json={"status": "qualified"})
+        assert response.status_code == 200
+
+    seen = []
+    params = {"status": "qualified", "limit": 2}
+    while True:
+        response = await client.get("/api/applications", params=params)
+        seen += [application["id"] for application in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        params = {"status": "qualified", "limit": 2, "cursor": cursor}
+
+    assert sorted(seen) == sorted(application["id"] for application in submitted[::2])
+
+async def test_cursor_cannot_be_combined_with_skip(client):
+    await submit(client, 0)
+    response = await client.get("/api/applications", params={"limit": 1})
+    cursor = response.headers["x-next-cursor"]
+
+    response = await client.get("/api/applications", params={"cursor": cursor, "skip": 1})
+    assert response.status_code == 400
+
+    response = await client.get("/api/applications", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+# Conditional updates
+async def test_update_bumps_version_and_etag(client):
+    application = await submit(client, 0)
+    url = f"/api/applications/{application['id']}"
+
+    response = await client.get(url)
+    first_etag = response.headers["etag"]
+    assert response.json()["version"] == 0
+
+    response = await client.put(url, json={"status": "contacted"}, headers={"If-Match": first_etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 1
+    assert response.json()["status"] == "contacted"
+    second_etag = response.headers["etag"]
+    assert second_etag != first_etag
+
+    response = await client.get(url, headers={"If-None-Match": second_etag})
+    assert response.status_code == 304
+
+async def test_stale_if_match_is_rejected(client):
+    application = await submit(client, 0)
+    url = f"/api/applications/{application['id']}"
+    stale_etag = (await client.get(url)).headers["etag"]
+
+    response = await client.put(url, json={"notes": "first edit"}, headers={"If-Match": stale_etag})
+    assert response.status_code == 200
+    current_etag = response.headers["etag"]
+
+    response = await client.put(url, json={"status": "rejected"}, headers={"If-Match": stale_etag})
+    assert response.status_code == 412
+    assert response.headers["etag"] == current_etag
+
+    # The rejected edit changed nothing
+    response = await client.get(url)
+    assert response.json()["status"] == "pending"
+    assert response.json()["notes"] == "first edit"
+    assert response.json()["version"] == 1
+
+async def test_if_match_any_and_missing_application(client):
+    application = await submit(client, 0)
+
+    response = await client.put(f"/api/applications/{application['id']}", json={"notes": "x"}, headers={"If-Match": "*"})
+    assert response.status_code == 200
+
+    response = await client.put("/api/applications/missing", json={"notes": "x"}, headers={"If-Match": "*"})
+    assert response.status_code == 404
+
+# Materialized counters
+async def test_update_moves_the_status_counters(client):
+    submitted = [await submit(client, number) for number in range(3)]
+    url = f"/api/applications/{submitted[0]['id']}"
+
+    assert (await client.put(url, json={"status": "qualified"})).status_code == 200
+    # Re-applying the same status or editing notes must not move the counters again
+    assert (await client.put(url, json={"status": "qualified"})).status_code == 200
+    assert (await client.put(url, json={"notes": "called back"})).status_code == 200
+
+    summary = await stats(client)
+    assert summary["total_applications"] == 3
+    assert summary["status_counts"] == {"pending": 2, "qualified": 1}
+    assert summary["pending_applications"] == 2
+    assert summary["qualified_applications"] == 1
+    assert summary["recent_applications_7_days"] == 3
+
+    assert await reconciled_counts(client) == {"pending": 2, "qualified": 1}
+
+async def test_bulk_update_moves_the_status_counters(client):
+    submitted = [await submit(client, number) for number in range(5)]
+    ids = [application["id"] for application in submitted]
+
+    response = await client.post("/api/applications/bulk-update", json={
+        "ids": ids[:2] + ["missing"],
+        "update": {"status": "contacted"},
+    })
+    assert response.json() == {"matched_count": 2, "modified_count": 2, "not_found": ["missing"]}
+
+    response = await client.post("/api/applications/bulk-update", json={
+        "filter": {"status": "pending"},
+        "update": {"status": "rejected"},
+    })
+    assert response.json()["modified_count"] == 3
+
+    # Mixed previous statuses are moved per status batch
+    response = await client.post("/api/applications/bulk-update", json={
+        "ids": ids[1:3],
+        "update": {"status": "approved"},
+    })
+    assert response.json()["modified_count"] == 2
+
+    summary = await stats(client)
+    assert summary["total_applications"] == 5
+    assert summary["status_counts"] == {"contacted": 1, "rejected": 2, "approved": 2}
+    assert await reconciled_counts(client) == summary["status_counts"]
+
+async def test_bulk_update_of_notes_keeps_the_counters(client):
+    submitted = [await submit(client, number) for number in range(2)]
+
+    response = await client.post("/api/applications/bulk-update", json={
+        "ids": [application["id"] for application in submitted],
+        "update": {"notes": "imported from the spring campaign"},
+    })
+    assert response.json()["modified_count"] == 2
+
+    summary = await stats(client)
+    assert summary["status_counts"] == {"pending": 2}
+    assert await reconciled_counts(client) == {"pending": 2}
+
+# Change feed
+async def test_change_feed_pages_through_every_write(client):
+    submitted = [await submit(client, number) for number in range(3)]
+    await client.put(f"/api/applications/{submitted[0]['id']}", json={"status": "qualified"})
+
+    response = await client.get("/api/applications/changes", params={"limit": 2})
+    page = response.json()
+    assert page["has_more"] is True
+    assert [change["id"] for change in page["changes"]] == [submitted[1]["id"], submitted[2]["id"]]
+
+    response = await client.get("/api/applications/changes", params={"since": page["watermark"], "limit": 2})
+    page = response.json()
+    assert page["has_more"] is False
+    assert [change["id"] for change in page["changes"]] == [submitted[0]["id"]]
+    assert page["changes"][0]["status"] == "qualified"
+
+async def test_change_feed_keeps_a_write_that_lands_after_the_settle_window(client, storage, monkeypatch):
+    monkeypatch.setattr(server, "CHANGES_SETTLE_SECONDS", 0.2)
+    insert_application = storage.insert_application
+    inserting = asyncio.Event()
+
+    async def slow_insert_application(document):
+        if document["first_name"] == "Test0":
+            inserting.set()
+            await asyncio.sleep(0.6)
+        return await insert_application(document)
+
+    monkeypatch.setattr(storage, "insert_application", slow_insert_application)
+
+    async def submit_after_slow_write_started():
+        await inserting.wait()
+        return await submit(client, 1)
+
+    async def poll_while_slow_write_is_in_flight():
+        await inserting.wait()
+        await asyncio.sleep(0.4)
+        response = await client.get("/api/applications/changes")
+        return response.json()
+
+    slow, fast, first_poll = await asyncio.gather(
+        submit(client, 0), submit_after_slow_write_started(), poll_while_slow_write_is_in_flight()
+    )
+
+    # The fast write settled and was handed out while the slow one was still in flight
+    assert [change["id"] for change in first_poll["changes"]] == [fast["id"]]
+
+    await asyncio.sleep(0.3)
+    response = await client.get("/api/applications/changes", params={"since": first_poll["watermark"]})
+    assert [change["id"] for change in response.json()["changes"]] == [slow["id"]]
+    assert slow["change_seq"] > first_poll["watermark"]
+
+async def test_data_routes_require_admin_credentials(client):
+    await submit(client, 0)
+    for path in ("/api/applications", "/api/applications/changes", "/api/applications/stats/summary"):
+        response = await client.get(path, auth=None)
+        assert response.status_code == 401
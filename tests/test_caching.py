@@ -0,0 +1,63 @@
+"""Conditional GETs on lists and stats, and the read-through caches"""
+import pytest
+
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+async def submit(client, number: int) -> dict:
+    return (await client.post("/api/applications/submit", json=application_payload(number))).json()
+
+async def cache_stats(client) -> dict:
+    return (await client.get("/api/admin/cache")).json()
+
+@pytest.mark.parametrize("path", ["/api/applications?limit=10", "/api/applications/stats/summary"])
+async def test_unchanged_collection_answers_304(client, path):
+    await submit(client, 0)
+    response = await client.get(path)
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    # Any write changes the generation
+    await submit(client, 1)
+    response = await client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+async def test_list_etag_depends_on_the_query(client):
+    await submit(client, 0)
+    everything = await client.get("/api/applications")
+    pending = await client.get("/api/applications", params={"status": "pending"})
+    assert everything.headers["etag"] != pending.headers["etag"]
+
+    response = await client.get("/api/applications", params={"status": "pending"},
+                                headers={"If-None-Match": everything.headers["etag"]})
+    assert response.status_code == 200
+
+async def test_update_invalidates_the_cached_application(client):
+    application = await submit(client, 0)
+    url = f"/api/applications/{application['id']}"
+
+    await client.get(url)
+    await client.get(url)
+    assert (await cache_stats(client))["applications"]["hits"] == 1
+
+    await client.put(url, json={"status": "qualified", "notes": "strong lead"})
+    response = await client.get(url)
+    assert (response.json()["status"], response.json()["notes"]) == ("qualified", "strong lead")
+
+async def test_update_invalidates_cached_list_pages(client):
+    application = await submit(client, 0)
+
+    await client.get("/api/applications")
+    await client.get("/api/applications")
+    assert (await cache_stats(client))["application_lists"]["hits"] == 1
+
+    await client.post("/api/applications/bulk-update", json={"ids": [application["id"]], "update": {"status": "approved"}})
+    response = await client.get("/api/applications")
+    assert response.json()[0]["status"] == "approved"
@@ -0,0 +1,97 @@
+"""Response compression and its interaction with conditional requests"""
+import pytest
+
+import server
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def applications(client):
+    # Enough applications for the list page to pass the compression threshold
+    submitted = []
+    for number in range(8):
+        response = await client.post("/api/applications/submit", json=application_payload(number))
+        submitted.append(response.json())
+    return submitted
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+])
+async def test_encoding_is_negotiated(client, applications, accept_encoding, expected):
+    response = await client.get("/api/applications", headers={"Accept-Encoding": accept_encoding})
+    assert response.headers.get("content-encoding") == expected
+    assert len(response.json()) == len(applications)
+    if expected:
+        assert "Accept-Encoding" in response.headers["vary"]
+
+async def test_small_responses_are_not_compressed(client, applications):
+    response = await client.get(f"/api/applications/{applications[0]['id']}", params={"fields": "status"},
+                                headers={"Accept-Encoding": "gzip"})
+    assert len(response.content) < server.COMPRESSION_MIN_SIZE
+    assert "content-encoding" not in response.headers
+
+async def test_streamed_export_is_compressed(client, applications):
+    response = await client.get("/api/applications/export", params={"batch_size": 1}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.text.splitlines()) == len(applications)
+
+async def test_compressed_list_carries_an_encoding_specific_etag(client, applications):
+    identity = await client.get("/api/applications", headers={"Accept-Encoding": "identity"})
+    gzipped = await client.get("/api/applications", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"'
+    assert gzipped.json() == identity.json()
+
+async def test_compressed_etag_revalidates(client, applications):
+    gzipped = await client.get("/api/applications", headers={"Accept-Encoding": "gzip"})
+    etag = gzipped.headers["etag"]
+
+    response = await client.get("/api/applications", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    # A write moves the collection on, in every encoding
+    await client.put(f"/api/applications/{applications[0]['id']}", json={"status": "contacted"})
+    response = await client.get("/api/applications", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 200
+
+async def test_if_match_accepts_a_compressed_etag(client, applications):
+    application = applications[0]
+    url = f"/api/applications/{application['id']}"
+    etag = (await client.get(url, headers={"Accept-Encoding": "identity"})).headers["etag"]
+    compressed_etag = etag[:-1] + '-gzip"'
+
+    response = await client.put(url, json={"notes": "x"}, headers={"If-Match": compressed_etag})
+    assert response.status_code == 200
+    response = await client.put(url, json={"notes": "y"}, headers={"If-Match": compressed_etag})
+    assert response.status_code == 412
+
+async def test_dashboard_assets_have_one_etag_per_encoding(client):
+    name = next(name for name in server.admin_dashboard_bundle.assets if name.endswith(".js"))
+    url = f"/admin/assets/{name}"
+    etags = {}
+    for encoding in ("identity", "gzip", "br"):
+        response = await client.get(url, headers={"Accept-Encoding": encoding})
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding", "identity") == encoding
+        etags[encoding] = response.headers["etag"]
+    assert len(set(etags.values())) == 3
+
+    response = await client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etags["gzip"]})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etags["gzip"]
+
+    # A cached copy in another encoding does not validate this one
+    response = await client.get(url, headers={"Accept-Encoding": "br", "If-None-Match": etags["gzip"]})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
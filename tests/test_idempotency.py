@@ -0,0 +1,112 @@
+"""Submissions retried with an Idempotency-Key create the application exactly once"""
+import asyncio
+
+import pytest
+
+import server
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+async def stored_application_count(client) -> int:
+    response = await client.get("/api/applications")
+    assert response.status_code == 200
+    return len(response.json())
+
+async def test_retry_replays_the_original_response(client, storage):
+    headers = {"Idempotency-Key": "retry-1"}
+
+    first = await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+
+    second = await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+    assert second.status_code == 200
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+
+    assert await stored_application_count(client) == 1
+    assert await storage.notification_status_counts() == {"pending": 1}
+
+async def test_key_reused_with_a_different_body_is_rejected(client):
+    headers = {"Idempotency-Key": "retry-2"}
+    response = await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+    assert response.status_code == 200
+
+    response = await client.post("/api/applications/submit", json=application_payload(1), headers=headers)
+    assert response.status_code == 422
+    assert await stored_application_count(client) == 1
+
+async def test_concurrent_retries_create_one_application(client, storage, monkeypatch):
+    # Hold the first request inside the insert so the others find the key in progress
+    insert_application = storage.insert_application
+    inserting = asyncio.Event()
+
+    async def slow_insert_application(document):
+        inserting.set()
+        await asyncio.sleep(0.3)
+        return await insert_application(document)
+
+    monkeypatch.setattr(storage, "insert_application", slow_insert_application)
+    headers = {"Idempotency-Key": "retry-3"}
+
+    async def submit_after_first_started():
+        await inserting.wait()
+        return await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+
+    responses = await asyncio.gather(
+        client.post("/api/applications/submit", json=application_payload(0), headers=headers),
+        *[submit_after_first_started() for _ in range(4)],
+    )
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 4
+    assert await stored_application_count(client) == 1
+    assert await storage.notification_status_counts() == {"pending": 1}
+
+async def test_concurrent_retry_gives_up_with_409(client, storage, monkeypatch):
+    insert_application = storage.insert_application
+    inserting = asyncio.Event()
+
+    async def slow_insert_application(document):
+        inserting.set()
+        await asyncio.sleep(0.5)
+        return await insert_application(document)
+
+    monkeypatch.setattr(storage, "insert_application", slow_insert_application)
+    monkeypatch.setattr(server, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    headers = {"Idempotency-Key": "retry-4"}
+
+    async def submit_after_first_started():
+        await inserting.wait()
+        return await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+
+    first, waiting = await asyncio.gather(
+        client.post("/api/applications/submit", json=application_payload(0), headers=headers),
+        submit_after_first_started(),
+    )
+
+    assert first.status_code == 200
+    assert waiting.status_code == 409
+    assert waiting.headers["retry-after"] == "1"
+
+async def test_failed_request_releases_the_key(client, storage, monkeypatch):
+    insert_application = storage.insert_application
+    failures = [RuntimeError("storage unavailable")]
+
+    async def flaky_insert_application(document):
+        if failures:
+            raise failures.pop()
+        return await insert_application(document)
+
+    monkeypatch.setattr(storage, "insert_application", flaky_insert_application)
+    headers = {"Idempotency-Key": "retry-5"}
+
+    response = await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+    assert response.status_code == 500
+
+    response = await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+    assert response.status_code == 200
+    assert "idempotent-replayed" not in response.headers
+    assert await stored_application_count(client) == 1
@@ -0,0 +1,89 @@
+"""Bulk import of partner lead lists and streaming export"""
+import csv
+import io
+import json
+
+import pytest
+
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+async def import_file(client, filename: str, content: str, **params):
+    return await client.post(
+        "/api/applications/import", params=params, files={"file": (filename, content.encode(), "application/octet-stream")}
+    )
+
+async def test_ndjson_import_reports_every_rejected_row(client):
+    lines = [
+        json.dumps(application_payload(0)),
+        "{not json",
+        "",
+        json.dumps(["not", "an", "object"]),
+        json.dumps(application_payload(1, email="not-an-email")),
+        json.dumps(application_payload(2)),
+    ]
+    response = await import_file(client, "leads.ndjson", "\n".join(lines), chunk_size=1)
+    assert response.status_code == 200
+    summary = response.json()
+
+    assert (summary["received"], summary["inserted"], summary["failed"]) == (5, 2, 3)
+    assert [error["row"] for error in summary["errors"]] == [2, 3, 4]
+    assert summary["errors"][0]["errors"][0].startswith("Invalid JSON")
+    assert summary["errors"][1]["errors"] == ["Row is not a JSON object"]
+    assert summary["errors"][2]["errors"][0].startswith("email:")
+
+    stats = (await client.get("/api/applications/stats/summary")).json()
+    assert stats["total_applications"] == 2
+    assert stats["status_counts"] == {"pending": 2}
+
+async def test_csv_import_treats_empty_cells_as_missing(client):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(application_payload(0)))
+    writer.writeheader()
+    writer.writerow(application_payload(0, business_name=""))
+    writer.writerow(application_payload(1, service_interest=""))
+
+    response = await import_file(client, "leads.csv", buffer.getvalue())
+    summary = response.json()
+    assert (summary["format"], summary["inserted"], summary["failed"]) == ("csv", 1, 1)
+    assert summary["errors"][0]["row"] == 2
+
+    applications = (await client.get("/api/applications")).json()
+    assert applications[0]["business_name"] is None
+
+async def test_import_needs_a_known_format(client):
+    response = await import_file(client, "leads.txt", json.dumps(application_payload(0)))
+    assert response.status_code == 400
+
+    response = await import_file(client, "leads.txt", json.dumps(application_payload(0)), format="ndjson")
+    assert response.json()["inserted"] == 1
+
+async def test_export_streams_every_application(client):
+    for number in range(5):
+        await client.post("/api/applications/submit", json=application_payload(number))
+
+    response = await client.get("/api/applications/export", params={"batch_size": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["email"] for row in rows) == [f"applicant{number}@example.com" for number in range(5)]
+
+    response = await client.get("/api/applications/export", params={"format": "csv", "batch_size": 2})
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5
+    assert rows[0]["status"] == "pending"
+
+async def test_export_filters_and_keeps_the_csv_header_when_empty(client):
+    submitted = (await client.post("/api/applications/submit", json=application_payload(0))).json()
+    await client.put(f"/api/applications/{submitted['id']}", json={"status": "approved"})
+    await client.post("/api/applications/submit", json=application_payload(1))
+
+    response = await client.get("/api/applications/export", params={"status": "approved"})
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [submitted["id"]]
+
+    response = await client.get("/api/applications/export", params={"format": "csv", "status": "rejected"})
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    assert lines[0].startswith("id,first_name,last_name")
@@ -0,0 +1,141 @@
+"""Outbox delivery against a local SMTP sink: success, retry with backoff, giving up"""
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+async def submit(client, number: int = 0) -> dict:
+    response = await client.post("/api/applications/submit", json=application_payload(number))
+    assert response.status_code == 200
+    return response.json()
+
+async def claim_at(storage, now: datetime):
+    """Claim the next outbox message as a worker would at the given time"""
+    return await storage.claim_notification(now, now + timedelta(seconds=server.NOTIFICATION_LEASE_SECONDS))
+
+async def test_notification_is_delivered(client, storage, smtp_sink):
+    await submit(client)
+
+    notification = await server.claim_notification()
+    assert notification["attempts"] == 1
+    await server.deliver_notification(notification)
+
+    assert len(smtp_sink.messages) == 1
+    assert "Subject: New Application Submitted - Test0 Applicant" in smtp_sink.messages[0]
+    assert await storage.notification_status_counts() == {"sent": 1}
+    assert await server.claim_notification() is None
+
+async def test_failed_delivery_backs_off_then_gives_up(client, storage, smtp_sink, monkeypatch):
+    monkeypatch.setattr(server, "NOTIFICATION_RETRY_SECONDS", 60)
+    monkeypatch.setattr(server, "NOTIFICATION_MAX_ATTEMPTS", 3)
+    smtp_sink.reject = True
+    await submit(client)
+
+    notification = await server.claim_notification()
+    failed_at = datetime.utcnow()
+    await server.deliver_notification(notification)
+    assert await storage.notification_status_counts() == {"pending": 1}
+
+    # Each retry waits twice as long as the one before: 60s, then 120s
+    for attempt, backoff in ((2, 60), (3, 120)):
+        assert await claim_at(storage, failed_at + timedelta(seconds=backoff - 5)) is None
+        retry_at = failed_at + timedelta(seconds=backoff + 5)
+        notification = await claim_at(storage, retry_at)
+        assert notification["attempts"] == attempt
+        assert notification["last_error"]
+
+        failed_at = datetime.utcnow()
+        await server.deliver_notification(notification)
+
+    # The third failure was the last attempt
+    assert await storage.notification_status_counts() == {"failed": 1}
+    assert await claim_at(storage, failed_at + timedelta(days=1)) is None
+    assert smtp_sink.messages == []
+
+    response = await client.get("/api/admin/notifications")
+    assert response.status_code == 200
+    assert response.json()["status_counts"] == {"failed": 1}
+
+async def test_delivery_recovers_after_a_failure(client, storage, smtp_sink):
+    smtp_sink.reject = True
+    await submit(client)
+    await server.deliver_notification(await server.claim_notification())
+
+    smtp_sink.reject = False
+    notification = await claim_at(storage, datetime.utcnow() + timedelta(seconds=server.NOTIFICATION_RETRY_SECONDS + 1))
+    await server.deliver_notification(notification)
+
+    assert len(smtp_sink.messages) == 1
+    assert await storage.notification_status_counts() == {"sent": 1}
+
+async def test_unauthenticated_smtp_requires_opt_in(client, storage, smtp_sink, monkeypatch):
+    monkeypatch.delenv("SMTP_ALLOW_UNAUTHENTICATED")
+    await submit(client)
+
+    await server.deliver_notification(await server.claim_notification())
+
+    assert smtp_sink.messages == []
+    assert await storage.notification_status_counts() == {"skipped": 1}
+
+# Outbox durability
+async def test_failed_enqueue_fails_the_submit_and_releases_the_key(client, storage, monkeypatch):
+    insert_notification = storage.insert_notification
+    failures = [RuntimeError("outbox unavailable")]
+
+    async def flaky_insert_notification(notification):
+        if failures:
+            raise failures.pop()
+        return await insert_notification(notification)
+
+    monkeypatch.setattr(storage, "insert_notification", flaky_insert_notification)
+    headers = {"Idempotency-Key": "outbox-1"}
+
+    response = await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+    assert response.status_code == 500
+    assert (await client.get("/api/applications")).json() == []
+
+    response = await client.post("/api/applications/submit", json=application_payload(0), headers=headers)
+    assert response.status_code == 200
+    assert await storage.notification_status_counts() == {"pending": 1}
+
+async def test_failed_insert_cancels_the_queued_notification(client, storage, smtp_sink, monkeypatch):
+    async def failing_insert_application(document):
+        raise RuntimeError("storage unavailable")
+
+    monkeypatch.setattr(storage, "insert_application", failing_insert_application)
+
+    response = await client.post("/api/applications/submit", json=application_payload(0))
+    assert response.status_code == 500
+    assert await storage.notification_status_counts() == {"skipped": 1}
+    assert await server.claim_notification() is None
+
+async def test_notification_waits_for_its_application(client, storage, smtp_sink):
+    # As if the process died between queueing the notification and the insert
+    application = server.new_application_document(server.ApplicationSubmissionCreate(**application_payload(0)))
+    await server.enqueue_notification("application_submitted", application)
+
+    notification = await server.claim_notification()
+    await server.deliver_notification(notification)
+    assert await storage.notification_status_counts() == {"pending": 1}
+    assert smtp_sink.messages == []
+
+    # The insert lands late: the notification goes out, without spending an attempt on the wait
+    await storage.insert_application(application)
+    notification = await claim_at(storage, datetime.utcnow() + timedelta(seconds=10))
+    assert notification["attempts"] == 1
+    await server.deliver_notification(notification)
+    assert len(smtp_sink.messages) == 1
+
+async def test_notification_for_an_application_never_stored_is_skipped(client, storage, smtp_sink, monkeypatch):
+    monkeypatch.setattr(server, "NOTIFICATION_APPLICATION_GRACE_SECONDS", 0)
+    application = server.new_application_document(server.ApplicationSubmissionCreate(**application_payload(0)))
+    await server.enqueue_notification("application_submitted", application)
+
+    await server.deliver_notification(await server.claim_notification())
+
+    assert await storage.notification_status_counts() == {"skipped": 1}
+    assert smtp_sink.messages == []
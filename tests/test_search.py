@@ -0,0 +1,37 @@
+"""Full-text and type-ahead search"""
+import pytest
+
+from .conftest import application_payload
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def lead(client):
+    response = await client.post("/api/applications/submit", json=application_payload(
+        0, first_name="Mary-Jane", last_name="O'Neil", business_name="Acme-Co Ltd.", email="mary.jane+leads@acme-co.com"
+    ))
+    assert response.status_code == 200
+    other = await client.post("/api/applications/submit", json=application_payload(1, business_name="Globex"))
+    assert other.status_code == 200
+    return response.json()
+
+async def search(client, q: str, mode: str = "prefix") -> list:
+    response = await client.get("/api/applications/search", params={"q": q, "mode": mode})
+    assert response.status_code == 200
+    return [application["id"] for application in response.json()]
+
+@pytest.mark.parametrize("q", [
+    "mary-jane", "Mary-J", "Ltd.", "acme-co ltd.", "acme-co ltd", "o'neil", "mary.jane", "mary.jane+leads@acme", "Mary.Jane+Leads@ACME-CO",
+])
+async def test_prefix_query_is_split_like_the_stored_terms(client, lead, q):
+    assert await search(client, q) == [lead["id"]]
+
+@pytest.mark.parametrize("q", ["mary-jane", "acme-co ltd.", "O'Neil"])
+async def test_text_and_prefix_modes_agree(client, storage, lead, q):
+    if storage.name == "mongo":
+        pytest.skip("mongomock does not implement $text queries")
+    assert await search(client, q, "text") == await search(client, q) == [lead["id"]]
+
+async def test_prefix_query_needs_every_term(client, lead):
+    assert await search(client, "mary globex") == []
+    assert await search(client, "---") == []
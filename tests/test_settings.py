@@ -0,0 +1,46 @@
+"""Validation of the MONGO_* connection pool settings"""
+import pytest
+
+import server
+
+@pytest.fixture(autouse=True)
+def clean_mongo_settings(monkeypatch):
+    for setting in [*server.MONGO_POOL_SETTINGS, "MONGO_COMPRESSORS"]:
+        monkeypatch.delenv(setting, raising=False)
+
+def test_no_settings_leave_the_driver_defaults():
+    assert server.mongo_client_options() == {}
+
+def test_pool_settings_map_to_driver_options(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "50")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", " 5 ")
+    monkeypatch.setenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib")
+
+    assert server.mongo_client_options() == {
+        "maxPoolSize": 50, "minPoolSize": 5, "waitQueueTimeoutMS": 2000, "compressors": ["zlib"],
+    }
+
+@pytest.mark.parametrize("setting, value, message", [
+    ("MONGO_MAX_POOL_SIZE", "many", "whole number"),
+    ("MONGO_MAX_POOL_SIZE", "-1", "at least 0"),
+    ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0", "at least 1"),
+    ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "1.5", "whole number"),
+    ("MONGO_COMPRESSORS", "lz4", "Unknown MONGO_COMPRESSORS"),
+])
+def test_invalid_settings_fail_at_startup(monkeypatch, setting, value, message):
+    monkeypatch.setenv(setting, value)
+    with pytest.raises(RuntimeError, match=message):
+        server.mongo_client_options()
+
+def test_min_pool_size_cannot_exceed_max(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "5")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "10")
+    with pytest.raises(RuntimeError, match="MONGO_MIN_POOL_SIZE"):
+        server.mongo_client_options()
+
+def test_compressor_without_its_package_is_rejected(monkeypatch):
+    monkeypatch.setitem(server.MONGO_COMPRESSOR_MODULES, "zstd", "package_that_is_not_installed")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zstd")
+    with pytest.raises(RuntimeError, match="needs the package_that_is_not_installed package"):
+        server.mongo_client_options()
@@ -0,0 +1,91 @@
+"""Storage interface contract, checked against every backend"""
+from datetime import datetime
+
+import pytest
+
+import server
+from storage import Storage
+from .conftest import application_payload
+
+def test_incomplete_backend_fails_on_construction():
+    class PartialStorage(Storage):
+        name = "partial"
+
+        async def describe_indexes(self):
+            return {}
+
+    with pytest.raises(TypeError, match="abstract"):
+        PartialStorage()
+
+def new_application(number: int = 0, **fields) -> dict:
+    document = server.new_application_document(server.ApplicationSubmissionCreate(**application_payload(number)))
+    document.update(fields)
+    return document
+
+def recount(total: int, status: dict) -> dict:
+    return {"total": total, "status": status, "daily": {}, "reconciled_at": datetime.utcnow()}
+
+@pytest.mark.anyio
+async def test_conditional_update_treats_a_missing_version_as_0(storage):
+    # Applications written before versioning have no version field at all
+    application = new_application()
+    del application["version"]
+    await storage.insert_application(application)
+
+    previous = await storage.update_application(application["id"], {"notes": "first"}, versions=[0])
+    assert previous is not None and previous.get("version", 0) == 0
+    assert await storage.update_application(application["id"], {"notes": "stale"}, versions=[0]) is None
+
+    assert await storage.update_application(application["id"], {"notes": "second"}, versions=[3, 1]) is not None
+    stored = await storage.get_application(application["id"])
+    assert (stored["notes"], stored["version"]) == ("second", 2)
+
+@pytest.mark.anyio
+async def test_status_guarded_bulk_write_skips_changed_applications(storage):
+    first, second = new_application(0), new_application(1)
+    await storage.insert_applications([first, second])
+    await storage.update_application(second["id"], {"status": "rejected"})
+
+    modified = await storage.update_applications_with_status(
+        [(first["id"], 10), (second["id"], 11)], "pending", {"status": "contacted"}
+    )
+
+    assert modified == 1
+    assert (await storage.get_application(first["id"]))["status"] == "contacted"
+    assert (await storage.get_application(first["id"]))["change_seq"] == 10
+    assert (await storage.get_application(second["id"]))["status"] == "rejected"
+
+@pytest.mark.anyio
+async def test_replace_counters_compares_the_generation(storage):
+    counters = await storage.replace_counters(recount(2, {"pending": 2}), expected_generation=0)
+    assert counters["generation"] == 1
+    assert counters["total"] == 2
+
+    # A write moved the generation on since the recount started
+    await storage.increment_counters({"generation": 1, "total": 1, "status.pending": 1})
+    assert await storage.replace_counters(recount(2, {"pending": 2}), expected_generation=1) is None
+    assert (await storage.get_counters())["total"] == 3
+
+    counters = await storage.replace_counters(recount(3, {"pending": 3}), expected_generation=2)
+    assert counters["generation"] == 3
+
+@pytest.mark.anyio
+async def test_replace_counters_loses_to_a_first_write(storage):
+    # The recount expected no counters yet, but a write created them meanwhile
+    await storage.increment_counters({"generation": 1, "total": 1})
+
+    assert await storage.replace_counters(recount(0, {}), expected_generation=0) is None
+    assert (await storage.get_counters())["total"] == 1
+
+@pytest.mark.anyio
+async def test_restamp_never_moves_a_change_back(storage):
+    application = new_application(change_seq=5)
+    await storage.insert_application(application)
+    restamped_at = server.mongo_utcnow()
+
+    await storage.restamp_changes([(application["id"], 9)], restamped_at)
+    await storage.restamp_changes([(application["id"], 7)], server.mongo_utcnow())
+
+    stored = await storage.get_application(application["id"])
+    assert stored["change_seq"] == 9
+    assert stored["updated_at"] == restamped_at